@@ -33,3 +33,11 @@ WITH (
 
 -- Verify
 SELECT * FROM EmjmdPrograms;
+
+
+-- Catalog version stamp: bumped after every reload so application caches refresh
+IF OBJECT_ID('dbo.CatalogMeta', 'U') IS NULL
+    CREATE TABLE CatalogMeta (
+        meta_key NVARCHAR(100) PRIMARY KEY,
+        meta_value NVARCHAR(200)
+    );
@@ -1,24 +1,106 @@
-import pyodbc
 import pandas as pd
-from typing import Dict
-from sentence_transformers import SentenceTransformer, util
-import torch
+import numpy as np
+from typing import Dict, List, Optional
 import re
+import hashlib
+import os
+import threading
+import time
+import embeddingStore
+import metrics
+from embeddingCache import EmbeddingCache, default_path as embedding_cache_path
+import fieldTaxonomy
+from fieldTaxonomy import FieldTaxonomy, canonical_fields
+from retrievalIndex import DEFAULT_NPROBE, ProgramIndex
+from resultCache import ResultCache
+from programRepository import ProgramRepository, get_repository
 
 class MatchingAlgorithm:
-    def __init__(self):
-        self.conn = pyodbc.connect(
-            'Driver={ODBC Driver 17 for SQL Server};'
-            'Server=DESKTOP-2G14Q4N\\MSSQLSERVER01;'
-            'Database=SmartScholar;'
-            'Trusted_Connection=yes;'
-        )
-        self.nlp_model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+    MODEL_NAME = 'all-MiniLM-L6-v2'
+    # fp32 = reference; int8 = dynamically quantized Linear layers; fp16 = half-size stored embeddings
+    ENCODER_MODES = ('fp32', 'fp16', 'int8', 'int8-fp16')
+    DEFAULT_DOMAIN = "Engineering & Technology"
+    # Field-similarity cut-offs of the scorer (unrelated / 30 / 42 / 50 points)
+    FIELD_BAND_EDGES = (0.28, 0.35, 0.45)
+    # Keyword shortcuts checked before falling back to embedding similarity
+    DOMAIN_KEYWORDS = [
+        (['ai', 'machine learning', 'data science', 'analytics', 'software', 'computer'], "Engineering & Technology"),
+        (['art', 'design', 'creative', 'culture', 'humanities'], "Humanities & Social Sciences"),
+    ]
+
+    def __init__(self, repository: ProgramRepository = None, encoder_mode: str = None, encoder=None):
+        # Seconds spent in each initialization phase (shown in the app's startup report)
+        self.init_timings = {}
+        start = time.perf_counter()
+        self.repository = repository or get_repository()
+        self.catalog_version = None
+        self.init_timings['repository'] = time.perf_counter() - start
+
+        self.encoder_mode = encoder_mode or os.environ.get('SMARTSCHOLAR_ENCODER', 'fp32')
+        if self.encoder_mode not in self.ENCODER_MODES:
+            raise ValueError(f"Unknown encoder mode '{self.encoder_mode}', expected one of {self.ENCODER_MODES}")
+        self.embedding_dtype = np.float16 if self.encoder_mode.endswith('fp16') else np.float32
+        # Artifacts from different models/modes must never be mixed, so both are part of the artifact key
+        self.model_name = getattr(encoder, 'model_name', self.MODEL_NAME)
+        self.embedding_model_key = self.model_name if self.encoder_mode == 'fp32' else f"{self.model_name}+{self.encoder_mode}"
+
+        start = time.perf_counter()
+        if encoder is not None:
+            # Any object with SentenceTransformer's encode() signature, e.g. stubEncoder.StubEncoder
+            self.nlp_model = encoder
+        else:
+            from sentence_transformers import SentenceTransformer  # heavy import (torch), deferred to first use
+            self.nlp_model = SentenceTransformer(self.MODEL_NAME, device='cpu')
+            if self.encoder_mode.startswith('int8'):
+                self.nlp_model = self._quantize_int8(self.nlp_model)
+        self.init_timings['model_load'] = time.perf_counter() - start
+        # Student texts repeat constantly; their embeddings are cached in memory and on disk
+        self.text_cache = EmbeddingCache(self.embedding_model_key, embedding_cache_path())
         self.main_domains = [
             "Engineering & Technology", "Law & Governance", "Mathematics & Statistics",
             "Psychology & Cognitive Science", "Biology & Life Sciences", "Physics & Physical Sciences",
             "Business & Economics", "Humanities & Social Sciences", "Medicine & Health", "Environmental Science"
         ]
+        # Domain centroids are encoded once; inference is a single matrix product
+        start = time.perf_counter()
+        self.domain_embeddings = embeddingStore.encode_texts(self.nlp_model, self.main_domains)
+        self.init_timings['domain_centroids'] = time.perf_counter() - start
+        # Program embedding matrix (memory-mapped) and program_id -> row lookup
+        self.program_embeddings = None
+        self._program_row = {}
+        self._program_texts = []
+        self._program_domains = None
+        self._embedding_key = None
+        self._loaded_frame = None
+        self._catalog_source = None
+        # Frame get_all_programs serves (only ever a repository or compiled catalog, never a caller's df)
+        self._catalog_frame = None
+        self._catalog_key = None
+        # Retrieval index for rank_top_k, built lazily for the catalog frame it was requested with
+        self._index = None
+        self._index_frame = None
+        # Compiled catalog artifact (catalogArtifact.py), used while its catalog version is current
+        self._compiled = None
+        self._compiled_frame = None
+        # Ranked results shared by every session, keyed by normalized profile and catalog version
+        self.result_cache = ResultCache()
+        # Student field -> similarity to every program, shared by the what-if analysis
+        self.similarity_cache = ResultCache(256, name='field_similarity')
+        # Canonical fields and their similarity to every program, rebuilt when the catalog embeddings change
+        self.field_snap = fieldTaxonomy.DEFAULT_SNAP
+        self._taxonomy = None
+        self._taxonomy_key = None
+        self._result_cache_version = None
+        self._threshold_frame = None
+        self._score_thresholds = None
+        # Guards catalog/embedding reloads when one instance serves several sessions
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _quantize_int8(model):
+        """Dynamic int8 quantization of every nn.Linear (weights int8, activations quantized on the fly)."""
+        import torch
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
 
     def _clean_text(self, text: str) -> str:
         """Removes filler academic words so AI focuses on the core subject."""
@@ -27,34 +109,129 @@ class MatchingAlgorithm:
         cleaned = re.sub(pattern, '', text, flags=re.IGNORECASE)
         return cleaned.strip()
 
+    def _program_text(self, program) -> str:
+        """Cleaned program text used for field similarity (falls back to the program name)."""
+        field = program['field']
+        raw = field if isinstance(field, str) and field else program['program_name']
+        return self._clean_text(raw)
+
+    def _encode(self, text: str) -> np.ndarray:
+        return self.encode_texts([text])[0]
+
+    def encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Student-side encoding through the text embedding cache (texts should already be cleaned)."""
+        return self.text_cache.encode(self.nlp_model, texts)
+
+    def load_program_embeddings(self, df: pd.DataFrame):
+        """Loads (or builds once and persists) the embedding matrix for the given catalog."""
+        with self._lock:
+            metrics.cache('program_embeddings', df is self._loaded_frame)
+            if df is self._loaded_frame:
+                return
+            if self._compiled is not None and df is self._compiled_frame:
+                self._activate_compiled()
+                return
+            if df is self._catalog_frame and self._catalog_key == self._embedding_key:
+                self._loaded_frame = df
+                return
+            program_ids = [int(p) for p in df['program_id']]
+            texts = [self._program_text(row) for _, row in df.iterrows()]
+            key = embeddingStore.text_hash(program_ids, texts)
+            if key == self._embedding_key:
+                self._loaded_frame = df
+                return
+            self.program_embeddings, domains = embeddingStore.build_or_load(
+                self.nlp_model, self.embedding_model_key, program_ids, texts,
+                domain_fn=lambda matrix: self.infer_domain_many(texts, matrix), domain_key=self._domain_key(),
+                dtype=self.embedding_dtype
+            )
+            self._program_row = {pid: i for i, pid in enumerate(program_ids)}
+            self._program_texts = texts
+            self._program_domains = np.array(domains, dtype=object)
+            self._embedding_key = key
+            self._loaded_frame = df
+
+    def _domain_key(self) -> str:
+        """Identifies the domain labels and keyword rules that stored program domains were computed with."""
+        spec = repr((self.main_domains, self.DOMAIN_KEYWORDS))
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:16]
+
+    def _program_embedding(self, program, clean_text: str) -> np.ndarray:
+        row = self._program_row.get(int(program['program_id'])) if self.program_embeddings is not None else None
+        if row is None:
+            return self._encode(clean_text)
+        return self.program_embeddings[row]
+
+    def _keyword_domain(self, clean_text: str) -> Optional[str]:
+        low_text = clean_text.lower()
+        for keywords, domain in self.DOMAIN_KEYWORDS:
+            if any(k in low_text for k in keywords):
+                return domain
+        return None
+
+    @metrics.timed('infer_domain')
+    def infer_domain_many(self, texts: List[str], embeddings: np.ndarray = None) -> List[str]:
+        """Batched infer_domain. Optional embeddings (one row per text) skip encoding for texts already clean."""
+        cleaned = [self._clean_text(t) for t in texts]
+        domains = [None] * len(cleaned)
+        pending = []
+        for i, text in enumerate(cleaned):
+            if not text:
+                domains[i] = self.DEFAULT_DOMAIN
+            else:
+                domains[i] = self._keyword_domain(text)
+                if domains[i] is None:
+                    pending.append(i)
+        metrics.inc('domain_inferences', len(cleaned) - len(pending), method='keyword')
+        metrics.inc('domain_inferences', len(pending), method='embedding')
+        if not pending:
+            return domains
+
+        if embeddings is not None:
+            reuse = [i for i in pending if cleaned[i] == texts[i]]
+            embs = {i: embeddings[i] for i in reuse}
+        else:
+            embs = {}
+        to_encode = [i for i in pending if i not in embs]
+        if to_encode:
+            encoded = self.encode_texts([cleaned[i] for i in to_encode])
+            embs.update(zip(to_encode, encoded))
+
+        matrix = np.stack([embs[i] for i in pending]).astype(np.float32, copy=False)
+        best = np.argmax(matrix @ self.domain_embeddings.T, axis=1)
+        for i, d in zip(pending, best):
+            domains[i] = self.main_domains[d]
+        return domains
+
     def infer_domain(self, text: str) -> str:
         try:
-            text = self._clean_text(text)
-            if not text: return "Engineering & Technology"
-            low_text = text.lower()
-            if any(k in low_text for k in ['ai', 'machine learning', 'data science', 'analytics', 'software', 'computer']):
-                return "Engineering & Technology"
-            if any(k in low_text for k in ['art', 'design', 'creative', 'culture', 'humanities']):
-                return "Humanities & Social Sciences"
-
-            text_emb = self.nlp_model.encode(text, convert_to_tensor=True)
-            domain_embs = self.nlp_model.encode(self.main_domains, convert_to_tensor=True)
-            sims = util.pytorch_cos_sim(text_emb, domain_embs)[0]
-            return self.main_domains[sims.argmax().item()]
+            return self.infer_domain_many([text])[0]
         except:
-            return "Engineering & Technology"
+            return self.DEFAULT_DOMAIN
+
+    def _program_domain(self, program, clean_text: str) -> str:
+        row = self._program_row.get(int(program['program_id'])) if self._program_domains is not None else None
+        if row is None:
+            return self.infer_domain(clean_text)
+        return self._program_domains[row]
 
     def calculate_total_match(self, student_profile: Dict, program: pd.Series) -> Dict:
         s_clean_field = self._clean_text(student_profile.get('field', ''))
-        p_raw_text = program['field'] if program['field'] else program['program_name']
-        p_clean_text = self._clean_text(p_raw_text)
+        p_clean_text = self._program_text(program)
 
-        if self.infer_domain(s_clean_field) != self.infer_domain(p_clean_text):
+        if self.infer_domain(s_clean_field) != self._program_domain(program, p_clean_text):
             return self._create_result(program, 0, "🔴", "Domain Mismatch")
 
-        student_emb = self.nlp_model.encode(s_clean_field, convert_to_tensor=True)
-        program_emb = self.nlp_model.encode(p_clean_text, convert_to_tensor=True)
-        similarity = float(util.pytorch_cos_sim(student_emb, program_emb)[0][0])
+        with self._lock:
+            row = self._program_row.get(int(program['program_id'])) if self.program_embeddings is not None else None
+            taxonomy = self._get_taxonomy() if row is not None else None
+        canonical, error, student_emb = self._canonical_field(taxonomy, s_clean_field) if taxonomy else (None, None, None)
+        similarity = float(taxonomy.table[canonical, row]) if canonical is not None else None
+        if similarity is None or fieldTaxonomy.near_edges(similarity, self.FIELD_BAND_EDGES, error):
+            if student_emb is None:
+                student_emb = self._encode(s_clean_field)
+            program_emb = self._program_embedding(program, p_clean_text)
+            similarity = float(np.dot(student_emb, program_emb))
         
         if similarity < 0.28: 
             return self._create_result(program, 0, "🔴", "Unrelated Field")
@@ -74,6 +251,379 @@ class MatchingAlgorithm:
         total = min(100, int(f_score + c_score + l_score + e_score + 5))
         return self._create_result(program, total, "🟢" if total >= 80 else "🟡" if total >= 60 else "🔴", "Match Found", f_score, c_score, l_score, e_score)
 
+    @metrics.timed('rank_programs')
+    def rank_programs(self, student_profile: Dict, df: pd.DataFrame = None,
+                      student_emb: np.ndarray = None, student_domain: str = None) -> pd.DataFrame:
+        """Scores the whole catalog at once and returns it sorted by overall_match (same columns as _create_result).
+
+        student_emb / student_domain can be passed in when the caller has already batch-encoded the field.
+        """
+        # The catalog version query runs before taking the lock, so sessions don't queue behind it
+        if df is None:
+            df = self.get_all_programs()
+        with self._lock:
+            self.load_program_embeddings(df)
+            # Consistent view even if another session triggers a catalog reload meanwhile
+            program_embeddings, program_domains = self.program_embeddings, self._program_domains
+            taxonomy = self._get_taxonomy()
+
+        s_clean_field = self._clean_text(student_profile.get('field', ''))
+        if student_domain is None:
+            student_domain = self.infer_domain(s_clean_field)
+        domain_ok = program_domains == student_domain
+        similarity = self._field_row(taxonomy, program_embeddings, s_clean_field, student_emb)
+        return self._score_frame(student_profile, df, similarity, domain_ok)
+
+    def _get_taxonomy(self) -> FieldTaxonomy:
+        """Canonical-field table for the loaded catalog embeddings, built on first use after a reload."""
+        with self._lock:
+            metrics.cache('field_taxonomy', self._taxonomy_key == self._embedding_key)
+            if self._taxonomy_key != self._embedding_key:
+                start = time.perf_counter()
+                cleaned = [self._clean_text(f) for f in canonical_fields(self.main_domains)]
+                # Lowercased too: normalize_profile lowercases fields before the cached ranking
+                labels = list(dict.fromkeys(cleaned + [f.lower() for f in cleaned]))
+                embeddings = self.encode_texts(labels)
+                self._taxonomy = FieldTaxonomy(labels, embeddings, self.program_embeddings, self.field_snap)
+                self._taxonomy_key = self._embedding_key
+                self.init_timings.setdefault('field_taxonomy', time.perf_counter() - start)
+            return self._taxonomy
+
+    def _canonical_field(self, taxonomy: FieldTaxonomy, clean_field: str, student_emb: np.ndarray = None):
+        """(taxonomy row standing in for the field or None, its largest error, student embedding if encoded).
+
+        Canonical fields are looked up without encoding; anything else is encoded (through the text
+        cache) and snapped to its nearest canonical field when that is close enough.
+        """
+        canonical = taxonomy.lookup(clean_field)
+        if canonical is not None:
+            metrics.inc('field_lookups', path='canonical')
+            return canonical, fieldTaxonomy.ROUNDING, student_emb
+        if student_emb is None:
+            student_emb = self._encode(clean_field)
+        canonical, error = taxonomy.snap(student_emb)
+        metrics.inc('field_lookups', path='encoder' if canonical is None else 'snapped')
+        return canonical, error, student_emb
+
+    def _field_row(self, taxonomy: FieldTaxonomy, program_embeddings: np.ndarray, clean_field: str,
+                   student_emb: np.ndarray = None) -> np.ndarray:
+        """Similarity of a student field to every program, exact wherever it decides the score band.
+
+        Starts from the canonical field's row and recomputes only the programs whose row value is
+        within the snap error of a band edge; without a canonical field it is the full product.
+        """
+        canonical, error, student_emb = self._canonical_field(taxonomy, clean_field, student_emb)
+        if canonical is not None:
+            row = taxonomy.table[canonical]
+            rows = np.flatnonzero(fieldTaxonomy.near_edges(row, self.FIELD_BAND_EDGES, error))
+            metrics.observe('field_row_exact', len(rows), metrics.SIZE_BUCKETS)
+            if not len(rows):
+                return row
+            if student_emb is None:
+                student_emb = self._encode(clean_field)
+            row = row.copy()
+            row[rows] = np.asarray(program_embeddings[rows], dtype=np.float32) @ student_emb
+            return row
+        if student_emb is None:
+            student_emb = self._encode(clean_field)
+        return np.asarray(program_embeddings, dtype=np.float32) @ student_emb
+
+    def _score_frame(self, student_profile: Dict, df: pd.DataFrame, similarity: np.ndarray,
+                     domain_ok: np.ndarray) -> pd.DataFrame:
+        """Vectorized calculate_total_match for the rows of df, given their field similarity and domain gate."""
+        matched = domain_ok & (similarity >= 0.28)
+
+        f_score = self._field_score(similarity)
+        c_score = self._cgpa_score(student_profile['cgpa'] / student_profile['cgpa_scale'],
+                                   self._numeric(df, 'min_cgpa'), self._numeric(df, 'cgpa_scale'))
+        l_score = self._lang_score(student_profile.get('ielts'), student_profile.get('toefl'),
+                                   self._numeric(df, 'min_ielts_score'), self._numeric(df, 'min_toefl_score'))
+        e_score = self._exp_score(student_profile['work_experience'])
+        total = np.minimum(100, f_score + c_score + l_score + e_score + 5)
+
+        total = np.where(matched, total, 0)
+        status = np.where(total >= 80, "🟢", np.where(total >= 60, "🟡", "🔴"))
+        reason = np.where(~domain_ok, "Domain Mismatch", np.where(matched, "Match Found", "Unrelated Field"))
+        result = pd.DataFrame({
+            'status': status, 'program_name': df['program_name'].to_numpy(), 'acronym': df['acronym'].to_numpy(),
+            'field': df['field'].to_numpy(), 'overall_match': total, 'field_score': np.where(matched, f_score, 0),
+            'cgpa_score': np.where(matched, c_score, 0), 'lang_score': np.where(matched, l_score, 0),
+            'exp_score': np.where(matched, e_score, 0), 'consortium': df['consortium'].to_numpy(),
+            'deadline': df['application_deadline'].to_numpy(), 'scholarship': df['scholarship'].to_numpy(), 'reason': reason
+        })
+        return result.sort_values('overall_match', ascending=False, kind='stable').reset_index(drop=True)
+
+    # Score components shared by _score_frame and the what-if analysis; every argument broadcasts,
+    # so a column of hypothetical values against a row of programs scores a whole grid at once
+
+    @staticmethod
+    def _field_score(similarity):
+        return np.where(similarity >= 0.45, 50, np.where(similarity >= 0.35, 42, 30))
+
+    @staticmethod
+    def _cgpa_score(cgpa_fraction, min_cgpa, cgpa_scale):
+        req_cgpa = np.nan_to_num(min_cgpa, nan=0.0)
+        norm_student = cgpa_fraction * np.nan_to_num(cgpa_scale, nan=4.0)
+        return np.where(norm_student >= req_cgpa, 25, np.maximum(5, np.trunc(25 - ((req_cgpa - norm_student) * 10)))).astype(int)
+
+    @staticmethod
+    def _lang_score(ielts, toefl, min_ielts, min_toefl):
+        ielts = np.nan_to_num(np.asarray(ielts if ielts is not None else 0, dtype=float))
+        toefl = np.nan_to_num(np.asarray(toefl if toefl is not None else 0, dtype=float))
+        # IELTS counts when the student has one and the program lists a minimum, otherwise TOEFL
+        use_ielts = (ielts > 0) & ~np.isnan(min_ielts)
+        use_toefl = ~use_ielts & (toefl > 0) & ~np.isnan(min_toefl)
+        with np.errstate(invalid='ignore'):
+            lang_ok = (use_ielts & (ielts >= min_ielts)) | (use_toefl & (toefl >= min_toefl))
+        return np.where(lang_ok, 15, 0)
+
+    @staticmethod
+    def _exp_score(work_experience):
+        return np.where(np.asarray(work_experience) >= 1, 5, 0)
+
+    def field_similarity(self, field: str, df: pd.DataFrame = None):
+        """(catalog frame, similarity, domain gate) for a student field, cached per field and catalog version."""
+        # The catalog version query runs before taking the lock, so sessions don't queue behind it
+        if df is None:
+            df = self.get_all_programs()
+        with self._lock:
+            self.load_program_embeddings(df)
+            program_embeddings, program_domains = self.program_embeddings, self._program_domains
+            taxonomy = self._get_taxonomy()
+            key = (self._embedding_key, self._clean_text(field))
+        cached = self.similarity_cache.get(key)
+        if cached is None:
+            clean_field = key[1]
+            similarity = self._field_row(taxonomy, program_embeddings, clean_field)
+            cached = (similarity, program_domains == self.infer_domain(clean_field))
+            self.similarity_cache.put(key, cached)
+        return (df,) + cached
+
+    def score_surface(self, student_profile: Dict, df: pd.DataFrame = None, **grids) -> np.ndarray:
+        """overall_match of every program over a grid of hypothetical profile values.
+
+        Each keyword (cgpa, ielts, toefl, work_experience) takes a 1-D array of values on the
+        student's own scale; the result has shape (programs, len(grid 1), len(grid 2), ...) in
+        keyword order, and anything not gridded keeps the profile's value. Rows follow df.
+        """
+        df, similarity, domain_ok = self.field_similarity(student_profile.get('field', ''), df)
+        values = {name: student_profile.get(name) for name in ('cgpa', 'ielts', 'toefl', 'work_experience')}
+        for axis, (name, grid) in enumerate(grids.items()):
+            if name not in values:
+                raise ValueError(f"Unknown what-if dimension '{name}'")
+            shape = [1] * (len(grids) + 1)
+            shape[axis + 1] = -1
+            values[name] = np.asarray(grid, dtype=float).reshape(shape)
+        column = lambda a: a.reshape((-1,) + (1,) * len(grids))
+        # Each component is scored on its own axes only and summed in int16, so the full-size
+        # array is allocated once
+        shape = (len(df),) + tuple(len(grid) for grid in grids.values())
+        total = np.empty(shape, dtype=np.int16)
+        total[...] = column(np.where(domain_ok & (similarity >= 0.28), self._field_score(similarity) + 5, -1000))
+        total += self._cgpa_score(values['cgpa'] / student_profile['cgpa_scale'], column(self._numeric(df, 'min_cgpa')),
+                                  column(self._numeric(df, 'cgpa_scale'))).astype(np.int16)
+        total += self._lang_score(values['ielts'], values['toefl'], column(self._numeric(df, 'min_ielts_score')),
+                                  column(self._numeric(df, 'min_toefl_score'))).astype(np.int16)
+        total += self._exp_score(values['work_experience']).astype(np.int16)
+        # Unmatched programs went negative above and score 0, like in rank_programs
+        return np.clip(total, 0, 100, out=total)
+
+    @metrics.timed('what_if')
+    def what_if(self, student_profile: Dict, thresholds=(60, 80), df: pd.DataFrame = None,
+                cgpa_step: float = None) -> pd.DataFrame:
+        """Per program, the smallest CGPA / IELTS / TOEFL / experience (changing one at a time) that
+        lifts overall_match to each threshold.
+
+        Columns are named like 'ielts_for_80'; the value is the profile's own one when the program
+        already reaches the threshold and NaN when that change alone cannot get there. CGPA is
+        searched in steps of cgpa_step (default 1/400 of the student's scale); IELTS and TOEFL are
+        searched over the catalog's own minimums, where the language score changes.
+        """
+        df, similarity, domain_ok = self.field_similarity(student_profile.get('field', ''), df)
+        matched = domain_ok & (similarity >= 0.28)
+        scale = student_profile['cgpa_scale']
+        cgpa, ielts, toefl = student_profile['cgpa'], student_profile.get('ielts') or 0, student_profile.get('toefl') or 0
+        experience = 1 if student_profile['work_experience'] >= 1 else 0
+        min_cgpa, cgpa_scale = self._numeric(df, 'min_cgpa'), self._numeric(df, 'cgpa_scale')
+        min_ielts, min_toefl = self._numeric(df, 'min_ielts_score'), self._numeric(df, 'min_toefl_score')
+
+        f_score = self._field_score(similarity)
+        c_score = self._cgpa_score(cgpa / scale, min_cgpa, cgpa_scale)
+        l_score = self._lang_score(ielts, toefl, min_ielts, min_toefl)
+        e_score = self._exp_score(experience)
+        total = np.where(matched, np.minimum(100, f_score + c_score + l_score + e_score + 5), 0)
+
+        step = cgpa_step or scale / 400
+        # dimension -> (grid starting at the profile's value, component score of values for rows, current score)
+        grids = {
+            'cgpa': (np.append(cgpa, np.round(np.arange(cgpa + step, scale + step / 2, step), 4)),
+                     lambda v, rows: self._cgpa_score(v / scale, min_cgpa[rows], cgpa_scale[rows]), c_score),
+            'ielts': (self._grid_above(ielts, min_ielts),
+                      lambda v, rows: self._lang_score(v, toefl, min_ielts[rows], min_toefl[rows]), l_score),
+            'toefl': (self._grid_above(toefl, min_toefl),
+                      lambda v, rows: self._lang_score(ielts, v, min_ielts[rows], min_toefl[rows]), l_score),
+            'work_experience': (np.array([experience, 1], dtype=float), lambda v, rows: self._exp_score(v), e_score),
+        }
+        result = pd.DataFrame({
+            'program_name': df['program_name'].to_numpy(), 'acronym': df['acronym'].to_numpy(),
+            'overall_match': total, 'status': np.where(total >= 80, "🟢", np.where(total >= 60, "🟡", "🔴")),
+        })
+        for name, (grid, score, current) in grids.items():
+            # Only one component moves, so reaching a threshold means that component reaching
+            # threshold - (everything else)
+            rest = total - current
+            # Scored on the grid, but reported as the profile's own value where it already suffices
+            # (experience is scored as 0/1 yet the profile may have e.g. 5 years)
+            shown = grid.copy()
+            shown[0] = student_profile['work_experience'] if name == 'work_experience' else grid[0]
+            for t in thresholds:
+                needed = np.where(matched, t - rest, np.inf)
+                first = self._first_reaching(grid, score, needed)
+                result[f"{name}_for_{t}"] = np.where(first < len(grid), shown[np.minimum(first, len(grid) - 1)], np.nan)
+        return result.sort_values('overall_match', ascending=False, kind='stable').reset_index(drop=True)
+
+    @staticmethod
+    def _first_reaching(grid: np.ndarray, score, needed: np.ndarray) -> np.ndarray:
+        """Per program, the index of the first grid value whose score reaches `needed` (len(grid) if none).
+
+        score(values, rows) scores one value per program for the given rows. grid[0] is the
+        profile's own value and is checked on its own; past it the score never decreases, so the
+        programs that reach `needed` at the top of the grid binary-search it in lockstep.
+        """
+        n, everyone = len(needed), slice(None)
+        first = np.where(score(np.full(n, grid[0]), everyone) >= needed, 0, len(grid))
+        rows = np.flatnonzero((first > 0) & (score(np.full(n, grid[-1]), everyone) >= needed))
+        need = needed[rows]
+        lo, hi = np.ones(len(rows), dtype=int), np.full(len(rows), len(grid) - 1)
+        while (lo < hi).any():
+            mid = (lo + hi) // 2
+            ok = score(grid[mid], rows) >= need
+            hi = np.where(ok, mid, hi)
+            lo = np.where(ok, lo, mid + 1)
+        first[rows] = lo
+        return first
+
+    @staticmethod
+    def _grid_above(value: float, minimums: np.ndarray) -> np.ndarray:
+        """The profile's value followed by every catalog minimum above it."""
+        thresholds = np.unique(minimums[~np.isnan(minimums)])
+        return np.append(float(value), thresholds[thresholds > value])
+
+    @metrics.timed('rank_top_k')
+    def rank_top_k(self, student_profile: Dict, k: int = 10, df: pd.DataFrame = None, hard_filters: bool = True,
+                   nprobe: int = DEFAULT_NPROBE, student_emb: np.ndarray = None, student_domain: str = None) -> pd.DataFrame:
+        """Top-k matches scored from a small candidate set instead of the whole catalog.
+
+        Candidates come from the retrieval index: same domain, field similarity above the cut-off and,
+        with hard_filters, CGPA and IELTS/TOEFL minimums the student meets. The nearest-neighbour
+        step is approximate on large catalogs (raise nprobe for better recall).
+
+        Returns at most k rows and never pads: programs failing the domain or similarity gate score 0
+        in rank_programs and are left out here. With an exhaustive nprobe and hard_filters=False the
+        rows are exactly rank_programs' non-zero matches, so fewer than k when fewer programs match.
+        """
+        # The catalog version query runs before taking the lock, so sessions don't queue behind it
+        if df is None:
+            df = self.get_all_programs()
+        with self._lock:
+            self.load_program_embeddings(df)
+            index = self._get_index(df)
+
+        s_clean_field = self._clean_text(student_profile.get('field', ''))
+        if student_domain is None:
+            student_domain = self.infer_domain(s_clean_field)
+        if student_emb is None:
+            student_emb = self._encode(s_clean_field)
+        rows, similarity = index.search(student_emb, student_domain, student_profile, nprobe, hard_filters=hard_filters)
+        metrics.observe('retrieval_candidates', len(rows), metrics.SIZE_BUCKETS)
+        result = self._score_frame(student_profile, df.iloc[rows], similarity, np.ones(len(rows), dtype=bool))
+        return result.head(k)
+
+    def _get_index(self, df: pd.DataFrame) -> ProgramIndex:
+        with self._lock:
+            metrics.cache('retrieval_index', df is self._index_frame)
+            if df is not self._index_frame:
+                start = time.perf_counter()
+                self._index = ProgramIndex(
+                    self.program_embeddings, self._program_domains, self._numeric(df, 'min_cgpa'),
+                    self._numeric(df, 'cgpa_scale'), self._numeric(df, 'min_ielts_score'),
+                    self._numeric(df, 'min_toefl_score')
+                )
+                self._index_frame = df
+                self.init_timings.setdefault('retrieval_index', time.perf_counter() - start)
+            return self._index
+
+    @staticmethod
+    def _bucket(value, thresholds: np.ndarray) -> float:
+        """Largest catalog minimum <= value, so every >= check against the catalog answers the same."""
+        if not value:
+            return 0.0
+        i = int(np.searchsorted(thresholds, value, side='right'))
+        if i:
+            return float(thresholds[i - 1])
+        # Positive but below every minimum (or no minimums at all): only "has a score" matters
+        return float(thresholds[0]) / 2 if len(thresholds) else 1.0
+
+    def normalize_profile(self, student_profile: Dict, df: pd.DataFrame) -> Dict:
+        """Canonical profile that ranks identically to the given one against df.
+
+        The field is cleaned and lowercased (the encoder is uncased), CGPA becomes a fraction of its
+        scale, and IELTS/TOEFL/experience are bucketed between the thresholds the catalog actually uses.
+        """
+        with self._lock:
+            if df is not self._threshold_frame:
+                self._score_thresholds = tuple(
+                    np.unique(c[~np.isnan(c)]) for c in (self._numeric(df, 'min_ielts_score'), self._numeric(df, 'min_toefl_score'))
+                )
+                self._threshold_frame = df
+            ielts_thresholds, toefl_thresholds = self._score_thresholds
+        return {
+            'field': self._clean_text(student_profile.get('field', '')).lower(),
+            'cgpa': student_profile['cgpa'] / student_profile['cgpa_scale'],
+            'cgpa_scale': 1.0,
+            'ielts': self._bucket(student_profile.get('ielts'), ielts_thresholds),
+            'toefl': self._bucket(student_profile.get('toefl'), toefl_thresholds),
+            'work_experience': 1 if student_profile['work_experience'] >= 1 else 0,
+        }
+
+    def rank_programs_cached(self, student_profile: Dict) -> pd.DataFrame:
+        """rank_programs on the current catalog, reused across sessions for equivalent profiles.
+
+        Entries are dropped as soon as the catalog version changes (and by the cache's size/TTL limits).
+        """
+        key, profile, df = self.result_cache_entry(student_profile)
+        return self.result_cache.get_or_compute(key, lambda: self.rank_programs(profile, df)).copy()
+
+    def result_cache_entry(self, student_profile: Dict):
+        """(cache key, normalized profile, catalog frame) for a profile; clears the cache after a catalog reload."""
+        df, version = self._catalog()
+        with self._lock:
+            if version != self._result_cache_version:
+                self.result_cache.clear()
+                self._result_cache_version = version
+        profile = self.normalize_profile(student_profile, df)
+        return (version, self.embedding_model_key) + tuple(sorted(profile.items())), profile, df
+
+    def rank_programs_batch(self, profiles: List[Dict], df: pd.DataFrame = None) -> List[pd.DataFrame]:
+        """Ranks many profiles with one encode call for all distinct student fields."""
+        if df is None:
+            df = self.get_all_programs()
+        fields = sorted({self._clean_text(p.get('field', '')) for p in profiles})
+        embs = self.encode_texts(fields)
+        domains = dict(zip(fields, self.infer_domain_many(fields, embs)))
+        emb_by_field = dict(zip(fields, embs))
+        results = []
+        for profile in profiles:
+            field = self._clean_text(profile.get('field', ''))
+            results.append(self.rank_programs(profile, df, emb_by_field[field], domains[field]))
+        return results
+
+    @staticmethod
+    def _numeric(df: pd.DataFrame, column: str) -> np.ndarray:
+        if column not in df:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
     def _create_result(self, program, match_val, status, reason, f=0, c=0, l=0, e=0):
         return {
             'status': status, 'program_name': program['program_name'], 'acronym': program['acronym'],
@@ -82,5 +632,87 @@ class MatchingAlgorithm:
             'deadline': program['application_deadline'], 'scholarship': program['scholarship'], 'reason': reason
         }
 
+    def use_compiled_catalog(self, catalog):
+        """Serves the catalog, domains and embeddings from a memory-mapped CompiledCatalog (zero-copy).
+
+        The artifact is used only while the repository's catalog version matches the one it was
+        compiled from; after a reload get_all_programs falls back to querying the repository.
+        """
+        meta = catalog.meta
+        if meta['embedding_model_key'] != self.embedding_model_key or meta['domain_key'] != self._domain_key():
+            raise ValueError(f"{catalog.path} was compiled for {meta['embedding_model_key']} / domains {meta['domain_key']}")
+        start = time.perf_counter()
+        frame = catalog.to_frame()
+        with self._lock:
+            self._compiled, self._compiled_frame = catalog, frame
+            self._activate_compiled()
+        self.init_timings['compiled_catalog'] = time.perf_counter() - start
+
+    def _activate_compiled(self):
+        frame = self._compiled_frame
+        self.program_embeddings = self._compiled.embeddings
+        self._program_domains = frame['domain'].to_numpy(dtype=object)
+        self._program_row = {int(pid): i for i, pid in enumerate(frame['program_id'])}
+        self._program_texts = []
+        self._embedding_key = self._compiled.meta['text_hash']
+        self._loaded_frame = frame
+        self._catalog_source = None
+        self.catalog_version = self._compiled.meta['catalog_version']
+
+    @metrics.timed('get_all_programs')
     def get_all_programs(self):
-        return pd.read_sql("SELECT ep.*, pr.* FROM EmjmdPrograms ep LEFT JOIN ProgramRequirements pr ON ep.program_id = pr.program_id", self.conn)
\ No newline at end of file
+        """Returns the cached catalog snapshot; the repository re-queries only when the catalog version changes."""
+        return self._catalog()[0]
+
+    def _catalog(self):
+        """(catalog frame, catalog version), with the matcher's embeddings switched to that frame.
+
+        The repository's version query runs outside the lock; the lock is held only to swap frames.
+        """
+        if self._compiled is not None:
+            version = self.repository.catalog_version()
+            with self._lock:
+                if self._compiled is not None and version == self._compiled.meta['catalog_version']:
+                    metrics.cache('catalog', True)
+                    self.load_program_embeddings(self._compiled_frame)
+                    return self._compiled_frame, self.catalog_version
+                self._compiled = self._compiled_frame = None
+        start = time.perf_counter()
+        df, version = self.repository.get_catalog()
+        self.init_timings.setdefault('catalog_fetch', time.perf_counter() - start)
+        with self._lock:
+            hit = df is self._catalog_source and self._catalog_frame is not None
+            metrics.cache('catalog', hit)
+            if not hit:
+                start = time.perf_counter()
+                self.load_program_embeddings(df)
+                self._catalog_frame = df.assign(domain=self._program_domains)
+                self._catalog_key = self._embedding_key
+                self._catalog_source = df
+                self.catalog_version = version
+                self.init_timings.setdefault('catalog_embeddings', time.perf_counter() - start)
+            self.load_program_embeddings(self._catalog_frame)
+            return self._catalog_frame, self.catalog_version
+
+
+_shared_matcher = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_matcher() -> MatchingAlgorithm:
+    """Process-wide matcher, created on first use and shared by every session/thread."""
+    global _shared_matcher
+    if _shared_matcher is None:
+        with _shared_lock:
+            if _shared_matcher is None:
+                matcher = MatchingAlgorithm()
+                compiled_path = os.environ.get('SMARTSCHOLAR_CATALOG_ARTIFACT')
+                if compiled_path and os.path.exists(compiled_path):
+                    from catalogArtifact import CompiledCatalog
+                    try:
+                        matcher.use_compiled_catalog(CompiledCatalog(compiled_path))
+                    except ValueError as exc:
+                        print(f"⚠️ Ignoring compiled catalog: {exc}")
+                matcher.get_all_programs()  # warm the catalog and embeddings before the first request
+                _shared_matcher = matcher
+    return _shared_matcher
\ No newline at end of file
@@ -0,0 +1,177 @@
+import argparse
+import csv
+import json
+import math
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from MatchingAlgo import get_shared_matcher
+
+# Loaded once in the parent; forked workers inherit the model and catalog copy-on-write
+_MATCHER = None
+_CATALOG = None
+
+RESULT_COLUMNS = ['profile_index', 'student_id', 'rank', 'status', 'program_name', 'acronym', 'overall_match',
+                  'field_score', 'cgpa_score', 'lang_score', 'exp_score', 'reason', 'deadline']
+
+
+def _load_shared():
+    global _MATCHER, _CATALOG
+    if _MATCHER is None:
+        _MATCHER = get_shared_matcher()
+        _CATALOG = _MATCHER.get_all_programs()
+
+
+def _init_worker():
+    """Keeps each worker single-threaded so N workers don't oversubscribe the CPU."""
+    import torch
+    torch.set_num_threads(1)
+    _load_shared()
+
+
+def _to_profile(row: dict, required=()) -> dict:
+    """Student profile from a CSV row or JSON body; raises ValueError for missing required or non-finite values."""
+    def num(key, default=0.0):
+        val = row.get(key)
+        if val is None or pd.isna(val) or val == '':
+            if key in required:
+                raise ValueError(f"{key} is required")
+            return default
+        # float() also accepts 'nan' and 'inf', which would slip past every range check
+        val = float(val)
+        if not math.isfinite(val):
+            raise ValueError(f"{key} must be a finite number")
+        return val
+
+    field = row.get('field')
+    return {
+        'field': '' if field is None or pd.isna(field) else str(field),
+        'cgpa': num('cgpa'),
+        'cgpa_scale': num('cgpa_scale', 4.0) or 4.0,
+        'ielts': num('ielts'),
+        'toefl': num('toefl'),
+        'work_experience': num('work_experience'),
+    }
+
+
+def match_chunk(start_index: int, rows: list, top_k: int) -> list:
+    """Ranks one chunk of profile rows and returns the top_k results per profile as flat records."""
+    profiles = [_to_profile(r) for r in rows]
+    ranked = _MATCHER.rank_programs_batch(profiles, _CATALOG)
+    records = []
+    for offset, (row, result) in enumerate(zip(rows, ranked)):
+        student_id = row.get('student_id', start_index + offset)
+        for rank, res in enumerate(result.head(top_k).to_dict('records'), 1):
+            rec = {'profile_index': start_index + offset, 'student_id': student_id, 'rank': rank}
+            rec.update({k: res[k] for k in RESULT_COLUMNS[3:]})
+            records.append(rec)
+    return records
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+class ResultWriter:
+    """Appends result records to CSV or JSONL (one line per profile) as chunks complete."""
+
+    def __init__(self, path: str):
+        self.jsonl = path.lower().endswith(('.jsonl', '.ndjson'))
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.csv = None if self.jsonl else csv.DictWriter(self.file, fieldnames=RESULT_COLUMNS)
+        if self.csv:
+            self.csv.writeheader()
+
+    def write(self, records: list):
+        if self.csv:
+            self.csv.writerows(records)
+        else:
+            by_profile = {}
+            for rec in records:
+                by_profile.setdefault(rec['profile_index'], []).append(rec)
+            for index, recs in by_profile.items():
+                line = {'profile_index': index, 'student_id': recs[0]['student_id'],
+                        'results': [{k: r[k] for k in RESULT_COLUMNS[2:]} for r in recs]}
+                self.file.write(json.dumps(line, ensure_ascii=False, default=_json_default) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def _read_chunks(path: str, chunk_size: int):
+    start = 0
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        rows = chunk.to_dict('records')
+        yield start, rows
+        start += len(rows)
+
+
+def run(input_path: str, output_path: str, workers: int, top_k: int, chunk_size: int) -> int:
+    t0 = time.perf_counter()
+    _load_shared()
+    print(f"✓ Model and catalog loaded ({len(_CATALOG)} programs) in {time.perf_counter() - t0:.1f}s")
+
+    writer = ResultWriter(output_path)
+    done = 0
+    t_start = time.perf_counter()
+
+    def report():
+        elapsed = time.perf_counter() - t_start
+        print(f"  {done} profiles | {done / elapsed if elapsed else 0:.1f} profiles/sec", file=sys.stderr)
+
+    try:
+        if workers <= 1:
+            for start, rows in _read_chunks(input_path, chunk_size):
+                writer.write(match_chunk(start, rows, top_k))
+                done += len(rows)
+                report()
+        else:
+            # fork shares the already-loaded model; other start methods load it once per worker
+            ctx = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+            max_pending = workers * 2
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+                pending = {}
+                for start, rows in _read_chunks(input_path, chunk_size):
+                    pending[pool.submit(match_chunk, start, rows, top_k)] = len(rows)
+                    # Bounded in-flight work keeps memory flat on arbitrarily large inputs
+                    while len(pending) >= max_pending:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in finished:
+                            writer.write(fut.result())
+                            done += pending.pop(fut)
+                        report()
+                for fut in list(pending):
+                    writer.write(fut.result())
+                    done += pending.pop(fut)
+                report()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - t_start
+    print(f"✅ Matched {done} profiles in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} profiles/sec) -> {output_path}")
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match a cohort of student profiles against all programs.")
+    parser.add_argument('input', help="CSV with columns field, cgpa, cgpa_scale, ielts, toefl, work_experience "
+                                      "(optional student_id)")
+    parser.add_argument('output', help="Output path (.csv, or .jsonl for one line per profile)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes (1 = in-process)")
+    parser.add_argument('--top-k', type=int, default=10, help="Results kept per profile")
+    parser.add_argument('--chunk-size', type=int, default=256, help="Profiles per work unit")
+    args = parser.parse_args(argv)
+    run(args.input, args.output, args.workers, args.top_k, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
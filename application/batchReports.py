@@ -0,0 +1,91 @@
+import argparse
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from batchMatch import _read_chunks, _to_profile
+from MatchingAlgo import get_shared_matcher
+from reportPdf import REPORT_ROWS, generate_pdf
+
+
+def render_chunk(items: list) -> list:
+    """Renders (name, profile, results) items to (name, pdf bytes) in a worker process."""
+    return [(name, generate_pdf(profile, results)) for name, profile, results in items]
+
+
+def _report_name(student_id, index: int, used: set) -> str:
+    base = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(student_id)).strip('_') or f"profile_{index}"
+    name = f"ScholarAI_Report_{base}.pdf"
+    if name in used:
+        name = f"ScholarAI_Report_{base}_{index}.pdf"
+    used.add(name)
+    return name
+
+
+def _ranked_items(matcher, catalog, input_path: str, chunk_size: int):
+    """Yields one work unit per input chunk: only the rows each report prints are kept."""
+    used = set()
+    for start, rows in _read_chunks(input_path, chunk_size):
+        profiles = [_to_profile(r) for r in rows]
+        ranked = matcher.rank_programs_batch(profiles, catalog)
+        items = []
+        for offset, (row, profile, result) in enumerate(zip(rows, profiles, ranked)):
+            index = start + offset
+            top = result.head(REPORT_ROWS)[['program_name', 'overall_match']].to_dict('records')
+            items.append((_report_name(row.get('student_id', index), index, used), profile, top))
+        yield items
+
+
+def run(input_path: str, output_path: str, workers: int, chunk_size: int) -> int:
+    t0 = time.perf_counter()
+    matcher = get_shared_matcher()
+    catalog = matcher.get_all_programs()
+    print(f"✓ Model and catalog loaded ({len(catalog)} programs) in {time.perf_counter() - t0:.1f}s")
+
+    done = 0
+    t_start = time.perf_counter()
+    # PDFs are already compressed, so entries are stored; each one is written as soon as it is rendered
+    with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        def write(reports):
+            nonlocal done
+            for name, pdf in reports:
+                archive.writestr(name, pdf)
+            done += len(reports)
+
+        if workers <= 1:
+            for items in _ranked_items(matcher, catalog, input_path, chunk_size):
+                write(render_chunk(items))
+        else:
+            max_pending = workers * 2
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = set()
+                for items in _ranked_items(matcher, catalog, input_path, chunk_size):
+                    pending.add(pool.submit(render_chunk, items))
+                    # Bounded in-flight work: memory holds a few chunks of PDFs, not the whole cohort
+                    while len(pending) >= max_pending:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in finished:
+                            write(fut.result())
+                for fut in pending:
+                    write(fut.result())
+
+    elapsed = time.perf_counter() - t_start
+    print(f"✅ Rendered {done} reports in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.1f} reports/sec) -> {output_path}")
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render PDF reports for a cohort of student profiles into one ZIP.")
+    parser.add_argument('input', help="CSV with columns field, cgpa, cgpa_scale, ielts, toefl, work_experience "
+                                      "(optional student_id, used for file names)")
+    parser.add_argument('output', help="Output .zip path")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Render processes (1 = in-process)")
+    parser.add_argument('--chunk-size', type=int, default=32, help="Reports per work unit")
+    args = parser.parse_args(argv)
+    run(args.input, args.output, args.workers, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import csv
+import os
+import time
+
+import nlpParser
+from requirementExtractor import extract_requirements
+
+DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dataset_clean.csv')
+
+
+def load_texts(path=DATASET):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f, delimiter='|')
+        return [row['requirement_text_raw'] for row in reader if row.get('requirement_text_raw')]
+
+
+def best_of(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark: per-field parse_*_spacy functions vs the single-pass extractor.")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--scale', type=int, default=10, help="Replicate the dataset texts this many times")
+    args = parser.parse_args()
+
+    texts = load_texts() * args.scale
+    # spaCy is excluded from the timing: both sides read the same precomputed docs
+    docs = list(nlpParser.get_nlp().pipe(texts, batch_size=64))
+    pairs = list(zip(docs, texts))
+
+    mismatches = sum(
+        nlpParser.parse_requirement_doc(i, doc, text) != extract_requirements(i, text, doc)
+        for i, (doc, text) in enumerate(pairs)
+    )
+
+    legacy = best_of(lambda: [nlpParser.parse_requirement_doc(i, d, t) for i, (d, t) in enumerate(pairs)], args.repeats)
+    single = best_of(lambda: [extract_requirements(i, t, d) for i, (d, t) in enumerate(pairs)], args.repeats)
+
+    n = len(pairs)
+    print(f"Texts: {n} | mismatching outputs: {mismatches}")
+    print(f"parse_*_spacy (multi-pass): {legacy / n * 1e6:8.1f} µs/text")
+    print(f"extract_requirements      : {single / n * 1e6:8.1f} µs/text")
+    print(f"Speedup: {legacy / single:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
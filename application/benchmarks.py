@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import embeddingStore
+from MatchingAlgo import MatchingAlgorithm
+from programRepository import ROOT_DIR, SqliteRepository
+from requirementExtractor import extract_requirements
+from stubEncoder import StubEncoder
+
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, 'artifacts', 'bench_results.json')
+DEFAULT_SCALES = [89, 1000, 10000, 100000]
+
+PROFILES = [
+    {'field': 'Bachelors in Computer Science', 'cgpa': 3.4, 'cgpa_scale': 4.0, 'ielts': 7.0, 'toefl': 0, 'work_experience': 1},
+    {'field': 'BSc Physics', 'cgpa': 8.1, 'cgpa_scale': 10.0, 'ielts': 0, 'toefl': 95, 'work_experience': 0},
+    {'field': 'Mechanical Engineering', 'cgpa': 3.0, 'cgpa_scale': 4.0, 'ielts': 6.5, 'toefl': 0, 'work_experience': 2},
+    {'field': 'Economics', 'cgpa': 4.2, 'cgpa_scale': 5.0, 'ielts': 0, 'toefl': 0, 'work_experience': 0},
+    {'field': 'Bachelors in Psychology', 'cgpa': 3.7, 'cgpa_scale': 4.0, 'ielts': 7.5, 'toefl': 0, 'work_experience': 3},
+    {'field': 'Environmental Science', 'cgpa': 2.9, 'cgpa_scale': 4.0, 'ielts': 0, 'toefl': 88, 'work_experience': 1},
+]
+
+REQUIREMENT_COLUMNS = ['min_toefl_score', 'min_ielts_score', 'min_cambridge_score', 'min_cgpa', 'cgpa_scale',
+                       'english_required', 'work_experience_years', 'accepted_degree_fields', 'parsing_confidence']
+
+
+def base_catalog(dataset_path: str) -> pd.DataFrame:
+    """The bundled programs, with requirement columns filled by the regex extractor when none are stored."""
+    repository = SqliteRepository(':memory:')
+    repository.load_csv(dataset_path)
+    df, _ = repository.get_catalog()
+    if df['min_cgpa'].isna().all():
+        parsed = [extract_requirements(pid, text) or {} for pid, text in zip(df['program_id'], df['requirement_text_raw'])]
+        for column in REQUIREMENT_COLUMNS:
+            df[column] = [p.get(column) for p in parsed]
+    return df
+
+
+def synthetic_catalog(base: pd.DataFrame, size: int, seed: int = 0) -> pd.DataFrame:
+    """Replicates the bundled programs up to `size` rows with fresh ids and perturbed requirement values."""
+    if size <= len(base):
+        return base.head(size).copy()
+    rng = np.random.default_rng(seed)
+    df = base.iloc[np.arange(size) % len(base)].reset_index(drop=True)
+    copy_no = np.arange(size) // len(base)
+    df['program_id'] = np.arange(1, size + 1)
+    df['program_name'] = [name if k == 0 else f"{name} #{k}" for name, k in zip(df['program_name'], copy_no)]
+
+    def jitter(column, spread, low, high, decimals):
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+        noisy = np.clip(values + rng.uniform(-spread, spread, size), low, high).round(decimals)
+        return np.where(copy_no == 0, values, noisy)
+
+    df['min_cgpa'] = jitter('min_cgpa', 0.3, 0.0, 5.0, 2)
+    df['min_ielts_score'] = jitter('min_ielts_score', 0.5, 4.0, 9.0, 1)
+    df['min_toefl_score'] = jitter('min_toefl_score', 8, 50, 120, 0)
+    return df
+
+
+def time_case(fn, repeats: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {
+        'repeats': repeats, 'mean_ms': float(samples.mean()), 'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)), 'min_ms': float(samples.min()),
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _cycle(items):
+    state = {'i': 0}
+
+    def next_item():
+        item = items[state['i'] % len(items)]
+        state['i'] += 1
+        return item
+    return next_item
+
+
+def run(dataset_path: str, scales, repeats: int, loop_max: int) -> dict:
+    results = {}
+
+    def record(name, fn, n=repeats, **extra):
+        stats = time_case(fn, n)
+        stats.update(extra)
+        results[name] = stats
+        print(f"  {name:<40} p50={stats['p50_ms']:10.3f} ms  p95={stats['p95_ms']:10.3f} ms", file=sys.stderr)
+
+    matcher = MatchingAlgorithm(SqliteRepository(':memory:'), encoder=StubEncoder())
+    base = base_catalog(dataset_path)
+    texts = [t for t in base['requirement_text_raw'] if isinstance(t, str) and t]
+
+    fields = _cycle([p['field'] for p in PROFILES])
+    record('infer_domain', lambda: matcher.infer_domain(matcher._clean_text(fields())), n=repeats * 10)
+
+    record('extract_requirements', lambda: [extract_requirements(i, t) for i, t in enumerate(texts)], texts=len(texts))
+    try:
+        import nlpParser
+        nlpParser.get_nlp()
+    except Exception as exc:
+        results['nlpParser.parse_requirements_batched'] = {'skipped': f"spaCy unavailable: {exc}"}
+    else:
+        rows = list(enumerate(texts))
+        record('nlpParser.parse_requirements_batched', lambda: list(nlpParser.parse_requirements_batched(rows)),
+               n=max(1, repeats // 5), texts=len(texts))
+        record('nlpParser.parse_requirements_tiered', lambda: list(nlpParser.parse_requirements_tiered(rows)),
+               n=max(1, repeats // 5), texts=len(texts))
+
+    for size in scales:
+        catalog = synthetic_catalog(base, size)
+        start = time.perf_counter()
+        matcher.load_program_embeddings(catalog)
+        results[f'catalog_embeddings[{size}]'] = {'build_ms': (time.perf_counter() - start) * 1000, 'programs': size}
+
+        profiles = _cycle(PROFILES)
+        record(f'rank_programs[{size}]', lambda: matcher.rank_programs(profiles(), catalog), programs=size)
+        record(f'rank_top_k[{size}]', lambda: matcher.rank_top_k(profiles(), 10, catalog), programs=size)
+        record(f'what_if[{size}]', lambda: matcher.what_if(profiles(), df=catalog), programs=size)
+        if size <= loop_max:
+            rows = [row for _, row in catalog.iterrows()]
+            record(f'calculate_total_match[{size}]',
+                   lambda: [matcher.calculate_total_match(profiles(), row) for row in rows],
+                   n=max(1, repeats // 10), programs=size)
+
+    try:
+        from reportPdf import generate_pdf
+    except ImportError as exc:
+        results['generate_pdf'] = {'skipped': f"fpdf unavailable: {exc}"}
+    else:
+        profile = PROFILES[0]
+        top = matcher.rank_programs(profile, synthetic_catalog(base, scales[0])).to_dict('records')
+        record('generate_pdf', lambda: generate_pdf(profile, top))
+
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Cases whose p50 got slower than the baseline by more than `threshold` (0.2 = 20%)."""
+    regressions = []
+    for name, stats in current['results'].items():
+        old = baseline.get('results', {}).get(name, {})
+        if 'p50_ms' not in stats or 'p50_ms' not in old or old['p50_ms'] <= 0:
+            continue
+        ratio = stats['p50_ms'] / old['p50_ms']
+        flag = '❌' if ratio > 1 + threshold else '✓'
+        print(f"{flag} {name:<40} {old['p50_ms']:10.3f} -> {stats['p50_ms']:10.3f} ms ({ratio:.2f}x)")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline latency benchmarks for matching, parsing and PDF reports "
+                                                 "(stub encoder, synthetic catalogs; no network or model download).")
+    parser.add_argument('--dataset', default=os.path.join(ROOT_DIR, 'dataset_clean.csv'))
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help="Synthetic catalog sizes")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--loop-max', type=int, default=1000,
+                        help="Largest catalog timed with the per-program calculate_total_match loop")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Results JSON")
+    parser.add_argument('--compare', help="Baseline results JSON from another commit")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed p50 slowdown vs the baseline")
+    args = parser.parse_args(argv)
+
+    # Synthetic catalogs must not leave embedding artifacts next to the real ones
+    with tempfile.TemporaryDirectory() as artifact_dir:
+        embeddingStore.ARTIFACT_DIR = artifact_dir
+        results = run(args.dataset, args.scales, args.repeats, args.loop_max)
+
+    report = {
+        'meta': {
+            'commit': _git_commit(), 'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'encoder': StubEncoder.model_name,
+            'repeats': args.repeats,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("✅ No latency regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import embeddingStore
+
+MAGIC = b'SSCAT01\n'
+ALIGN = 64
+CATALOG_ENV = 'SMARTSCHOLAR_CATALOG_ARTIFACT'
+# Columns the scorer, retrieval index and result rows read (requirement minimums may be stored as
+# strings when they hold nulls); other text is decoded on access only
+FRAME_COLUMNS = ('program_id', 'program_name', 'acronym', 'field', 'consortium', 'application_deadline',
+                 'scholarship', 'domain', 'min_cgpa', 'cgpa_scale', 'min_ielts_score', 'min_toefl_score',
+                 'min_cambridge_score', 'work_experience_years')
+
+
+def default_path() -> str:
+    return os.environ.get(CATALOG_ENV) or os.path.join(embeddingStore.ARTIFACT_DIR, 'catalog.sscat')
+
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _encode_strings(values):
+    """Offset-indexed UTF-8: string i is blob[offsets[i]:offsets[i + 1]]; None is recorded in the null mask."""
+    encoded = [b'' if v is None else v.encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    nulls = np.array([v is None for v in values], dtype=bool)
+    return offsets, blob, nulls
+
+
+class StringColumn:
+    """Read-only view of an offset-indexed string column; strings are decoded on access."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, nulls: np.ndarray = None):
+        self.offsets, self.blob, self.nulls = offsets, blob, nulls
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int):
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def to_array(self) -> np.ndarray:
+        raw = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        out = np.array([raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(self))], dtype=object)
+        if self.nulls is not None:
+            out[self.nulls] = None
+        return out
+
+
+class CatalogWriter:
+    """Collects typed arrays and writes them into one aligned file: magic, header length, JSON header, arrays."""
+
+    def __init__(self):
+        self.arrays = {}
+        self.columns = []
+
+    def _add(self, key: str, array: np.ndarray) -> str:
+        self.arrays[key] = np.ascontiguousarray(array)
+        return key
+
+    def add_numeric(self, name: str, values: np.ndarray):
+        self.columns.append({'name': name, 'kind': 'numeric', 'data': self._add(f"{name}.data", values)})
+
+    def add_strings(self, name: str, values):
+        values = [None if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v) for v in values]
+        distinct = list(dict.fromkeys(v for v in values if v is not None))
+        if len(distinct) <= len(values) // 2:
+            # Interned: per-row dictionary codes (-1 = null) plus each distinct string once
+            code_of = {v: i for i, v in enumerate(distinct)}
+            codes = np.array([-1 if v is None else code_of[v] for v in values], dtype=np.int32)
+            offsets, blob, _ = _encode_strings(distinct)
+            self.columns.append({'name': name, 'kind': 'interned', 'codes': self._add(f"{name}.codes", codes),
+                                 'offsets': self._add(f"{name}.offsets", offsets), 'blob': self._add(f"{name}.blob", blob)})
+        else:
+            offsets, blob, nulls = _encode_strings(values)
+            column = {'name': name, 'kind': 'strings', 'offsets': self._add(f"{name}.offsets", offsets),
+                      'blob': self._add(f"{name}.blob", blob)}
+            if nulls.any():
+                column['nulls'] = self._add(f"{name}.nulls", nulls)
+            self.columns.append(column)
+
+    def write(self, path: str, meta: dict, embeddings: np.ndarray):
+        self._add('embeddings', embeddings)
+        specs, position = {}, 0
+        for key, array in self.arrays.items():
+            specs[key] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': position}
+            position = _align(position + array.nbytes)
+        header = json.dumps({'meta': meta, 'columns': self.columns, 'arrays': specs}).encode('utf-8')
+        data_start = _align(len(MAGIC) + 8 + len(header))
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + len(header).to_bytes(8, 'little') + header)
+            for key, array in self.arrays.items():
+                f.seek(data_start + specs[key]['offset'])
+                f.write(array.tobytes())
+            f.truncate(data_start + position)
+        os.replace(tmp, path)
+
+
+class CompiledCatalog:
+    """A compiled catalog opened memory-mapped: every array is a read-only view into the page cache,
+    so processes opening the same file share one physical copy."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled catalog")
+            header_length = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_length))
+        self.meta = header['meta']
+        self._columns = {c['name']: c for c in header['columns']}
+        self._specs = header['arrays']
+        self._data_start = _align(len(MAGIC) + 8 + header_length)
+        self._buffer = np.memmap(path, dtype=np.uint8, mode='r')
+
+    def _array(self, key: str) -> np.ndarray:
+        spec = self._specs[key]
+        return np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=self._buffer,
+                          offset=self._data_start + spec['offset'])
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        return self._array('embeddings')
+
+    def __len__(self) -> int:
+        return int(self.meta['programs'])
+
+    def numeric(self, name: str) -> np.ndarray:
+        return self._array(self._columns[name]['data'])
+
+    def strings(self, name: str) -> StringColumn:
+        column = self._columns[name]
+        if column['kind'] == 'interned':
+            raise ValueError(f"{name} is interned; use codes()/values()")
+        return StringColumn(self._array(column['offsets']), self._array(column['blob']),
+                            self._array(column['nulls']) if 'nulls' in column else None)
+
+    def codes(self, name: str):
+        """(per-row codes, distinct strings) of an interned column."""
+        column = self._columns[name]
+        return self._array(column['codes']), StringColumn(self._array(column['offsets']), self._array(column['blob'])).to_array()
+
+    def values(self, name: str) -> np.ndarray:
+        column = self._columns[name]
+        if column['kind'] == 'numeric':
+            return self.numeric(name)
+        if column['kind'] == 'strings':
+            return self.strings(name).to_array()
+        codes, distinct = self.codes(name)
+        # Rows share the decoded string objects; null codes (-1) map to the trailing None
+        return np.append(distinct, None)[codes]
+
+    @property
+    def lazy_columns(self):
+        """String columns to_frame() leaves in the mapped file (read them with strings() or values())."""
+        return [name for name, c in self._columns.items() if c['kind'] != 'numeric' and name not in FRAME_COLUMNS]
+
+    def to_frame(self, strings=FRAME_COLUMNS) -> pd.DataFrame:
+        """Numeric columns as views of the mapped file plus the given string columns, decoded.
+
+        Wide text (requirement texts, descriptions) is not copied into every process unless asked for.
+        """
+        return pd.DataFrame({name: self.values(name) for name, c in self._columns.items()
+                             if c['kind'] == 'numeric' or name in strings}, copy=False)
+
+
+def build(matcher, path: str = None) -> str:
+    """Compiles the matcher's current catalog (programs, requirements, domains, embeddings) into one file."""
+    path = path or default_path()
+    df = matcher.get_all_programs()
+    writer = CatalogWriter()
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            writer.add_numeric(name, series.to_numpy())
+        else:
+            writer.add_strings(name, series.tolist())
+    meta = {
+        'programs': len(df), 'catalog_version': matcher.catalog_version, 'embedding_model_key': matcher.embedding_model_key,
+        'domain_key': matcher._domain_key(), 'text_hash': matcher._embedding_key,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    writer.write(path, meta, np.asarray(matcher.program_embeddings))
+    return path
+
+
+if __name__ == "__main__":
+    from MatchingAlgo import MatchingAlgorithm
+
+    parser = argparse.ArgumentParser(description="Compile the program catalog, requirements and embeddings into one memory-mappable file.")
+    parser.add_argument('--output', default=default_path())
+    args = parser.parse_args()
+
+    path = build(MatchingAlgorithm(), args.output)
+    start = time.perf_counter()
+    catalog = CompiledCatalog(path)
+    catalog.to_frame()
+    print(f"✓ Compiled catalog: {len(catalog)} programs, {os.path.getsize(path) / 1024:.1f} KiB -> {path}")
+    print(f"✓ Opened and materialized in {(time.perf_counter() - start) * 1000:.1f} ms")
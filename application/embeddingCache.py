@@ -0,0 +1,191 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable, List
+
+import numpy as np
+
+import embeddingStore
+import metrics
+from resultCache import ResultCache
+
+DEFAULT_SIZE = int(os.environ.get('SMARTSCHOLAR_EMBEDDING_CACHE_SIZE', '4096'))
+CACHE_ENV = 'SMARTSCHOLAR_EMBEDDING_CACHE'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (model, text)
+)
+"""
+
+
+def default_path():
+    """SMARTSCHOLAR_EMBEDDING_CACHE, 'off' for memory only, or artifacts/embedding_cache.db."""
+    path = os.environ.get(CACHE_ENV)
+    if path and path.lower() in ('off', 'none', '0'):
+        return None
+    return path or os.path.join(embeddingStore.ARTIFACT_DIR, 'embedding_cache.db')
+
+
+class EmbeddingCache:
+    """Text -> embedding cache for one model: an in-process LRU in front of a SQLite key-value file.
+
+    The file survives restarts and is shared by every process pointing at it (WAL mode, one
+    connection per thread). Texts are expected to be cleaned already; the model key keeps
+    different models and encoder modes apart.
+    """
+
+    def __init__(self, model_key: str, path: str = None, maxsize: int = DEFAULT_SIZE):
+        self.model_key = model_key
+        self.path = path
+        self.memory = ResultCache(maxsize, ttl=float('inf'), name='embedding_memory')
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.disk_hits = self.disk_misses = self.encoded = 0
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross fork(): forked workers (batchMatch, batchReports) open their own
+        conn, pid = getattr(self._local, 'conn', None), getattr(self._local, 'pid', None)
+        if conn is None or pid != os.getpid():
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            self._local.pid = os.getpid()
+        return conn
+
+    def _disk_get(self, texts: List[str]) -> dict:
+        found = {}
+        conn = self._connection()
+        # Stays under SQLite's bound-parameter limit
+        for start in range(0, len(texts), 500):
+            chunk = texts[start:start + 500]
+            rows = conn.execute(
+                f"SELECT text, vector FROM embeddings WHERE model = ? AND text IN ({', '.join('?' for _ in chunk)})",
+                [self.model_key] + chunk
+            ).fetchall()
+            found.update((text, np.frombuffer(vector, dtype=np.float32)) for text, vector in rows)
+        return found
+
+    def _disk_put(self, items: dict):
+        conn = self._connection()
+        conn.executemany(
+            "INSERT OR IGNORE INTO embeddings (model, text, vector) VALUES (?, ?, ?)",
+            [(self.model_key, text, np.asarray(emb, dtype=np.float32).tobytes()) for text, emb in items.items()]
+        )
+        conn.commit()
+
+    def encode(self, model, texts: List[str]) -> np.ndarray:
+        """Embeddings for texts (one row each), encoding only those in neither tier, in one batch."""
+        found = {}
+        for text in dict.fromkeys(texts):
+            emb = self.memory.get(text)
+            if emb is not None:
+                found[text] = emb
+        missing = [text for text in dict.fromkeys(texts) if text not in found]
+        if missing and self.path:
+            from_disk = self._disk_get(missing)
+            with self._lock:
+                self.disk_hits += len(from_disk)
+                self.disk_misses += len(missing) - len(from_disk)
+            for text in missing:
+                metrics.cache('embedding_disk', text in from_disk)
+            for text, emb in from_disk.items():
+                self.memory.put(text, emb)
+            found.update(from_disk)
+            missing = [text for text in missing if text not in from_disk]
+        if missing:
+            encoded = dict(zip(missing, embeddingStore.encode_texts(model, missing)))
+            with self._lock:
+                self.encoded += len(missing)
+            for text, emb in encoded.items():
+                self.memory.put(text, emb)
+            if self.path:
+                self._disk_put(encoded)
+            found.update(encoded)
+        if not texts:
+            return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack([found[text] for text in texts]).astype(np.float32, copy=False)
+
+    def warm_up(self, model, texts: Iterable[str], batch_size: int = 256) -> int:
+        """Encodes and stores every distinct text not cached yet; returns how many were encoded."""
+        before = self.encoded
+        batch = []
+        for text in dict.fromkeys(texts):
+            batch.append(text)
+            if len(batch) >= batch_size:
+                self.encode(model, batch)
+                batch = []
+        if batch:
+            self.encode(model, batch)
+        return self.encoded - before
+
+    def disk_entries(self) -> int:
+        if not self.path:
+            return 0
+        return self._connection().execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", [self.model_key]).fetchone()[0]
+
+    def clear(self):
+        self.memory.clear()
+        if self.path:
+            conn = self._connection()
+            conn.execute("DELETE FROM embeddings WHERE model = ?", [self.model_key])
+            conn.commit()
+
+    def stats(self, include_disk: bool = True) -> dict:
+        """Hit counters; include_disk=False skips counting the file's entries (a table scan)."""
+        memory = self.memory.stats()
+        with self._lock:
+            lookups = memory['hits'] + memory['misses']
+            hits = memory['hits'] + self.disk_hits
+            return {
+                'model': self.model_key, 'path': self.path, 'memory_size': memory['size'], 'memory_maxsize': memory['maxsize'],
+                'memory_hits': memory['hits'], 'disk_hits': self.disk_hits, 'disk_misses': self.disk_misses,
+                'encoded': self.encoded, 'hit_rate': hits / lookups if lookups else 0.0,
+                'disk_entries': self.disk_entries() if include_disk else None,
+            }
+
+
+def read_query_log(path: str) -> List[str]:
+    """Student field strings from a query log: CSV with a 'field' column, JSON lines with a 'field' key,
+    or plain text with one field per line."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if path.endswith('.csv'):
+            return [row['field'] for row in csv.DictReader(f) if row.get('field')]
+        if path.endswith(('.jsonl', '.ndjson')):
+            records = (json.loads(line) for line in f if line.strip())
+            return [r['field'] for r in records if isinstance(r, dict) and r.get('field')]
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv=None):
+    from MatchingAlgo import MatchingAlgorithm
+
+    parser = argparse.ArgumentParser(description="Warm the student-field embedding cache from historical query logs.")
+    parser.add_argument('logs', nargs='*', help="CSV (field column), JSON lines (field key) or one field per line")
+    parser.add_argument('--clear', action='store_true', help="Drop this model's cached embeddings first")
+    args = parser.parse_args(argv)
+
+    matcher = MatchingAlgorithm()
+    cache = matcher.text_cache
+    if args.clear:
+        cache.clear()
+    for path in args.logs:
+        fields = [matcher._clean_text(f) for f in read_query_log(path)]
+        encoded = cache.warm_up(matcher.nlp_model, [f for f in fields if f])
+        print(f"✓ {path}: {len(fields)} queries, {len(set(fields))} distinct, {encoded} newly encoded")
+    stats = cache.stats()
+    print(f"✅ {stats['disk_entries']} cached embeddings for {stats['model']} in {stats['path'] or 'memory only'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import glob
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+
+# Bump when the on-disk layout or the text preparation changes
+ARTIFACT_VERSION = 1
+# Older matrices per model kept on disk after a rebuild (processes may still have them mapped)
+KEEP_ARTIFACTS = 3
+ARTIFACT_DIR = os.environ.get(
+    'SMARTSCHOLAR_ARTIFACT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'artifacts')
+)
+
+
+def text_hash(program_ids: List, texts: List[str]) -> str:
+    """Hashes the (program_id, cleaned text) pairs an embedding matrix was built from."""
+    h = hashlib.sha256(f"v{ARTIFACT_VERSION}".encode('utf-8'))
+    for pid, text in zip(program_ids, texts):
+        h.update(f"\x1e{pid}\x1f{text}".encode('utf-8'))
+    return h.hexdigest()
+
+
+def row_hash(text: str) -> str:
+    """Identifies one program text, so its embedding can be reused when other programs change."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9]+', '-', model_name).strip('-')
+
+
+def artifact_paths(model_name: str, digest: str) -> Tuple[str, str]:
+    base = os.path.join(ARTIFACT_DIR, f"program_emb_{_slug(model_name)}_{digest[:16]}")
+    return base + '.npy', base + '.json'
+
+
+def _previous_artifacts(model_name: str) -> List[str]:
+    """Metadata paths of this model's stored matrices, newest first."""
+    paths = glob.glob(os.path.join(ARTIFACT_DIR, f"program_emb_{_slug(model_name)}_*.json"))
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def encode_texts(model, texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Encodes texts into L2-normalized float32 rows, so cosine similarity is a dot product."""
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    metrics.inc('encode_calls')
+    metrics.observe('encode_batch_size', len(texts), metrics.SIZE_BUCKETS)
+    with metrics.timer('encode'):
+        embs = model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True,
+                            normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(embs, dtype=np.float32)
+
+
+def load_program_embeddings(model_name: str, program_ids: List, texts: List[str]) -> Optional[Tuple[np.ndarray, dict]]:
+    """Memory-maps a previously built matrix and returns it with its metadata, or None if no matching artifact exists."""
+    digest = text_hash(program_ids, texts)
+    npy_path, meta_path = artifact_paths(model_name, digest)
+    if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != ARTIFACT_VERSION or meta.get('model_name') != model_name or meta.get('text_hash') != digest:
+        return None
+    matrix = np.load(npy_path, mmap_mode='r')
+    if matrix.shape[0] != len(program_ids):
+        return None
+    return matrix, meta
+
+
+def _write_meta(meta_path: str, meta: dict):
+    tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, meta_path)
+
+
+def save_program_embeddings(model_name: str, program_ids: List, texts: List[str], matrix: np.ndarray,
+                            domains: Optional[List[str]] = None, domain_key: Optional[str] = None,
+                            dtype=np.float32) -> str:
+    """Writes the matrix and its metadata atomically so concurrent readers never see a partial file."""
+    digest = text_hash(program_ids, texts)
+    npy_path, meta_path = artifact_paths(model_name, digest)
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+
+    tmp_npy = f"{npy_path}.{os.getpid()}.tmp"
+    with open(tmp_npy, 'wb') as f:
+        np.save(f, np.ascontiguousarray(matrix, dtype=dtype))
+    os.replace(tmp_npy, npy_path)
+
+    _write_meta(meta_path, {
+        'version': ARTIFACT_VERSION,
+        'model_name': model_name,
+        'text_hash': digest,
+        'rows': int(matrix.shape[0]),
+        'dim': int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        'dtype': np.dtype(dtype).name,
+        'program_ids': [int(p) for p in program_ids],
+        'row_hashes': [row_hash(t) for t in texts],
+        'domains': domains,
+        'domain_key': domain_key,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    return npy_path
+
+
+def _reusable_rows(model_name: str, texts: List[str]):
+    """(previous matrix, target rows, source rows) for texts already embedded in the newest stored matrix."""
+    previous_paths = _previous_artifacts(model_name)
+    if not previous_paths:
+        return None
+    meta_path = previous_paths[0]
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != ARTIFACT_VERSION or meta.get('model_name') != model_name or not meta.get('row_hashes'):
+            return None
+        previous = np.load(meta_path[:-len('.json')] + '.npy', mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    source = {h: i for i, h in enumerate(meta['row_hashes'])}
+    pairs = [(i, source[h]) for i, h in enumerate(map(row_hash, texts)) if h in source]
+    if not pairs:
+        return None
+    target, rows = zip(*pairs)
+    return previous, list(target), list(rows)
+
+
+def encode_incremental(model, model_name: str, texts: List[str]) -> np.ndarray:
+    """Encodes only texts missing from the newest stored matrix of this model; the other rows are copied."""
+    reusable = _reusable_rows(model_name, texts)
+    if reusable is None:
+        metrics.inc('embedding_rows_encoded', len(texts))
+        return encode_texts(model, texts)
+    previous, target, rows = reusable
+    matrix = np.empty((len(texts), previous.shape[1]), dtype=np.float32)
+    matrix[target] = previous[rows]
+    reused = set(target)
+    missing = [i for i in range(len(texts)) if i not in reused]
+    if missing:
+        matrix[missing] = encode_texts(model, [texts[i] for i in missing])
+    metrics.inc('embedding_rows_reused', len(target))
+    metrics.inc('embedding_rows_encoded', len(missing))
+    return matrix
+
+
+def prune_artifacts(model_name: str, keep: int = KEEP_ARTIFACTS):
+    """Deletes all but the newest `keep` matrices of this model."""
+    for meta_path in _previous_artifacts(model_name)[keep:]:
+        for path in (meta_path[:-len('.json')] + '.npy', meta_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # still mapped by another process (Windows); retried on the next rebuild
+
+
+def build_or_load(model, model_name: str, program_ids: List, texts: List[str],
+                  domain_fn: Optional[Callable[[np.ndarray], List[str]]] = None,
+                  domain_key: Optional[str] = None, dtype=np.float32) -> Tuple[np.ndarray, Optional[List[str]]]:
+    """Returns the memory-mapped program matrix and per-program domains, computing and persisting them if needed.
+
+    Domains are stored in the artifact metadata and recomputed (from the stored matrix, without
+    re-encoding) whenever domain_key changes, e.g. after editing the domain labels. After a catalog
+    change only new or edited program texts are encoded; the other rows are copied from the
+    previous matrix. A float16 dtype halves the on-disk and mapped size; model_name should then
+    name the mode too.
+    """
+    loaded = load_program_embeddings(model_name, program_ids, texts)
+    metrics.cache('embedding_artifact', loaded is not None)
+    if loaded is None:
+        matrix = encode_incremental(model, model_name, texts)
+        domains = domain_fn(matrix) if domain_fn else None
+        save_program_embeddings(model_name, program_ids, texts, matrix, domains, domain_key, dtype)
+        prune_artifacts(model_name)
+        loaded = load_program_embeddings(model_name, program_ids, texts)
+
+    matrix, meta = loaded
+    if domain_fn and (meta.get('domains') is None or meta.get('domain_key') != domain_key):
+        meta['domains'] = domain_fn(matrix)
+        meta['domain_key'] = domain_key
+        _write_meta(artifact_paths(model_name, meta['text_hash'])[1], meta)
+    return matrix, meta.get('domains')
+
+
+if __name__ == "__main__":
+    # Ingest step: precompute the program embedding matrix for the current catalog
+    from MatchingAlgo import MatchingAlgorithm
+
+    matcher = MatchingAlgorithm()
+    programs = matcher.get_all_programs()
+    print(f"✓ Program embeddings ready: {matcher.program_embeddings.shape[0]} programs x "
+          f"{matcher.program_embeddings.shape[1]} dims ({matcher.embedding_model_key})")
+    print(programs['domain'].value_counts().to_string())
@@ -0,0 +1,106 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+import embeddingStore
+from MatchingAlgo import MatchingAlgorithm
+from programRepository import ROOT_DIR, SqliteRepository
+
+# Field-similarity cut-offs used by the scorer (unrelated / 30 / 42 / 50 points)
+SIMILARITY_THRESHOLDS = [0.28, 0.35, 0.45]
+
+GENERIC_FIELDS = [
+    "Bachelors in Computer Science", "BSc Physics", "Mechanical Engineering", "BBA Finance", "Economics",
+    "Bachelors in Psychology", "Biology", "Law", "English Literature", "Environmental Science",
+    "Mathematics", "Medicine", "Architecture", "Civil Engineering", "Data Science", "Fine Arts",
+]
+
+
+def sample_profiles(dataset_path: str, limit: int):
+    """Student fields drawn from the programs' accepted_fields, plus common degree names."""
+    fields = list(GENERIC_FIELDS)
+    with open(dataset_path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f, delimiter='|'):
+            for part in (row.get('accepted_fields') or '').split(','):
+                part = part.strip()
+                if 3 <= len(part) <= 60 and part not in fields:
+                    fields.append(part)
+    rng = np.random.default_rng(0)
+    profiles = []
+    for field in fields[:limit]:
+        scale = float(rng.choice([4.0, 5.0, 10.0]))
+        profiles.append({
+            'field': field, 'cgpa': round(float(rng.uniform(0.55, 1.0)) * scale, 2), 'cgpa_scale': scale,
+            'ielts': float(rng.choice([0.0, 6.0, 6.5, 7.0])), 'toefl': int(rng.choice([0, 85, 95, 105])),
+            'work_experience': int(rng.choice([0, 1, 3])),
+        })
+    return profiles
+
+
+def field_similarities(matcher: MatchingAlgorithm, profiles):
+    fields = [matcher._clean_text(p['field']) for p in profiles]
+    start = time.perf_counter()
+    # Straight to the model: the matcher's text cache would turn reruns into cache-hit timings
+    embs = np.stack([embeddingStore.encode_texts(matcher.nlp_model, [f])[0] for f in fields])
+    encode_ms = (time.perf_counter() - start) / len(fields) * 1000
+    return np.asarray(embs @ np.asarray(matcher.program_embeddings, dtype=np.float32).T), encode_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a fast encoder mode against full precision on the bundled dataset.")
+    parser.add_argument('--mode', default='int8', choices=[m for m in MatchingAlgorithm.ENCODER_MODES if m != 'fp32'])
+    parser.add_argument('--dataset', default=os.path.join(ROOT_DIR, 'dataset_clean.csv'))
+    parser.add_argument('--profiles', type=int, default=200)
+    parser.add_argument('--max-band-changes', type=int, default=0,
+                        help="Allowed (profile, program) pairs that cross a similarity threshold")
+    parser.add_argument('--max-rank-changes', type=int, default=0,
+                        help="Allowed profiles whose top-10 ranking or scores change")
+    args = parser.parse_args()
+
+    repository = SqliteRepository(':memory:')
+    repository.load_csv(args.dataset)
+    baseline = MatchingAlgorithm(repository, encoder_mode='fp32')
+    candidate = MatchingAlgorithm(repository, encoder_mode=args.mode)
+    catalog = baseline.get_all_programs()
+    candidate.get_all_programs()
+    profiles = sample_profiles(args.dataset, args.profiles)
+
+    base_sims, base_ms = field_similarities(baseline, profiles)
+    cand_sims, cand_ms = field_similarities(candidate, profiles)
+    drift = np.abs(base_sims - cand_sims)
+    # Only pairs that pass the domain gate can change a score
+    student_domains = np.array([baseline.infer_domain(baseline._clean_text(p['field'])) for p in profiles], dtype=object)
+    gated = student_domains[:, None] == baseline._program_domains[None, :]
+    crossed = np.digitize(base_sims, SIMILARITY_THRESHOLDS) != np.digitize(cand_sims, SIMILARITY_THRESHOLDS)
+    band_changes = int((crossed & gated).sum())
+    domain_changes = int((baseline._program_domains != candidate._program_domains).sum())
+
+    rank_changes = 0
+    for profile in profiles:
+        base = baseline.rank_programs(profile, catalog).head(10)
+        cand = candidate.rank_programs(profile, catalog).head(10)
+        if not (base[['program_name', 'overall_match']].values == cand[['program_name', 'overall_match']].values).all():
+            rank_changes += 1
+
+    base_mem = np.asarray(baseline.program_embeddings).nbytes
+    cand_mem = np.asarray(candidate.program_embeddings).nbytes
+    print(f"Mode: {args.mode} vs fp32 | {len(profiles)} profiles x {len(catalog)} programs")
+    print(f"Field similarity drift: mean={drift.mean():.4f} p99={np.percentile(drift, 99):.4f} max={drift.max():.4f}")
+    print(f"Threshold band changes ({'/'.join(map(str, SIMILARITY_THRESHOLDS))}, domain-matched pairs): {band_changes}")
+    print(f"Program domain changes: {domain_changes}")
+    print(f"Profiles with changed top-10 ranking/scores: {rank_changes}")
+    print(f"Encode latency: fp32={base_ms:.2f} ms/text, {args.mode}={cand_ms:.2f} ms/text")
+    print(f"Program embedding memory: fp32={base_mem / 1024:.1f} KiB, {args.mode}={cand_mem / 1024:.1f} KiB")
+
+    if band_changes > args.max_band_changes or rank_changes > args.max_rank_changes:
+        print("❌ Drift exceeds tolerance - match outcomes would change")
+        sys.exit(1)
+    print("✅ Match outcomes unchanged within tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from requirementExtractor import FIELD_KEYWORDS
+
+# Cosine similarity a student field needs to its nearest canonical field to start from that field's row
+DEFAULT_SNAP = float(os.environ.get('SMARTSCHOLAR_FIELD_SNAP', '0.98'))
+# Float rounding between a table row and the exact product of the same text
+ROUNDING = 1e-6
+
+
+def canonical_fields(domains: List[str]) -> List[str]:
+    """The accepted-field keyword table's fields followed by the matcher's domains, without repeats."""
+    return list(dict.fromkeys(list(FIELD_KEYWORDS) + list(domains)))
+
+
+def _key(text: str) -> str:
+    return ' '.join(text.split())
+
+
+class FieldTaxonomy:
+    """Canonical fields and their precomputed similarity to every program of one catalog.
+
+    A student field that is exactly a label (after cleaning, ignoring spacing) reads its row;
+    any other field snaps to its nearest label when that is at least snap_threshold similar.
+    A snapped row is only an estimate: for unit vectors |s.p - c.p| <= |s - c| = sqrt(2 - 2 s.c),
+    so entries within that margin of a score band edge are recomputed exactly by the caller
+    (see near_edges) and the banded score never changes. Callers pass labels in every casing
+    they look up (the result cache lowercases fields), since each row embeds that exact text.
+    """
+
+    def __init__(self, labels: List[str], embeddings: np.ndarray, program_embeddings: np.ndarray,
+                 snap_threshold: float = DEFAULT_SNAP):
+        self.labels = labels
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.snap_threshold = snap_threshold
+        self.index = {_key(label): i for i, label in enumerate(labels)}
+        # (canonical fields x programs), the only per-catalog cost
+        self.table = self.embeddings @ np.asarray(program_embeddings, dtype=np.float32).T
+        # Rows are handed out to every session as-is
+        self.table.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def lookup(self, clean_text: str) -> Optional[int]:
+        return self.index.get(_key(clean_text))
+
+    def snap(self, embedding: np.ndarray) -> Tuple[Optional[int], float]:
+        """(nearest label, largest error of its row as a stand-in), or (None, inf) when it is too far."""
+        similarities = self.embeddings @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.snap_threshold:
+            return None, float('inf')
+        return best, margin(float(similarities[best]))
+
+
+def margin(similarity: float) -> float:
+    """Largest change of any program's similarity when a field is replaced by one this similar to it."""
+    return float(np.sqrt(max(0.0, 2.0 - 2.0 * similarity))) + ROUNDING
+
+
+def near_edges(values: np.ndarray, edges, error: float) -> np.ndarray:
+    """Mask of values that could fall on the other side of a band edge if off by up to error."""
+    values = np.asarray(values)
+    near = np.zeros(values.shape, dtype=bool)
+    for edge in edges:
+        near |= np.abs(values - edge) <= error
+    return near
@@ -1,19 +1,177 @@
+import argparse
 import csv
+import os
+import re
+import sys
+import time
+import unicodedata
 
-input_file = r'C:\Users\Home\Documents\Projects\Smart Scholar\dataset.txt'
-output_file = r'C:\Users\Home\Documents\Projects\Smart Scholar\dataset_clean.txt'
+from programRepository import PROGRAM_COLUMNS, ROOT_DIR, get_repository
 
-# Columns to REMOVE (0-based index)
-columns_to_remove = [3, 4]  # duration_months, ects_credits
+# Raw export columns that are not part of EmjmdPrograms
+DROP_COLUMNS = ['duration_months', 'ects', 'ects_credits']
 
-with open(input_file, mode='r', encoding='utf-8-sig') as infile, \
-     open(output_file, mode='w', encoding='utf-8', newline='') as outfile:
+# NVARCHAR limits from "SQL script/Main DB.sql" (other text columns are NVARCHAR(MAX))
+MAX_LENGTHS = {'program_name': 500, 'acronym': 100, 'website': 500, 'field': 300, 'cgpa_gpa': 200,
+               'application_deadline': 200}
+REQUIRED = ['program_id', 'program_name']
+NULL_VALUES = {'', 'null', 'none', 'n/a', 'na', '-'}
 
-    reader = csv.reader(infile, delimiter=',', quotechar='"')
-    writer = csv.writer(outfile, delimiter='|', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+_CONTROL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+_SPACES = re.compile(r'[ \t]+')
+_BARE_DOMAIN = re.compile(r'[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)+(/\S*)?')
 
-    for row in reader:
-        row = [col for idx, col in enumerate(row) if idx not in columns_to_remove]
-        writer.writerow(row)
+# Requirement texts can be far longer than csv's default 128 KiB field limit
+csv.field_size_limit(64 * 1024 * 1024)
 
-print("CSV cleaned and ready for import:", output_file)
+
+class RowError(ValueError):
+    pass
+
+
+def normalize_value(value: str):
+    """NFC text with control characters removed and runs of spaces collapsed; null markers become None."""
+    value = _SPACES.sub(' ', _CONTROL.sub('', unicodedata.normalize('NFC', value))).strip()
+    return None if value.lower() in NULL_VALUES else value
+
+
+def validate_row(values: dict) -> list:
+    """Returns the row as a PROGRAM_COLUMNS-ordered list, or raises RowError."""
+    row = {name: normalize_value(values.get(name) or '') for name in PROGRAM_COLUMNS}
+    for name in REQUIRED:
+        if row[name] is None:
+            raise RowError(f"missing {name}")
+    try:
+        row['program_id'] = int(row['program_id'])
+    except ValueError:
+        raise RowError(f"program_id '{row['program_id']}' is not an integer")
+    if row['program_id'] <= 0:
+        raise RowError(f"program_id {row['program_id']} is not positive")
+    for name, limit in MAX_LENGTHS.items():
+        if row[name] is not None and len(row[name]) > limit:
+            raise RowError(f"{name} longer than {limit} characters")
+    # Bare domains ('www.marihe.eu') get a scheme; free-text notes ('Check ... site') are kept as-is
+    if row['website'] and _BARE_DOMAIN.fullmatch(row['website']):
+        row['website'] = 'https://' + row['website']
+    return [row[name] for name in PROGRAM_COLUMNS]
+
+
+def read_rows(path: str, delimiter: str, drop_columns):
+    """Streams (line_no, row | None, error | None) from the raw file, mapping columns by header name."""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter, quotechar='"')
+        header = [h.strip() for h in next(reader)]
+        unknown = [h for h in header if h not in PROGRAM_COLUMNS and h not in drop_columns]
+        if unknown:
+            raise SystemExit(f"❌ Unknown columns {unknown}; add them to --drop or to the schema")
+        missing = [c for c in REQUIRED if c not in header]
+        if missing:
+            raise SystemExit(f"❌ Required columns missing from header: {missing}")
+        for raw in reader:
+            if not raw:
+                continue
+            if len(raw) != len(header):
+                yield reader.line_num, None, f"expected {len(header)} fields, got {len(raw)} (merged or split record?)"
+                continue
+            try:
+                yield reader.line_num, validate_row(dict(zip(header, raw))), None
+            except RowError as exc:
+                yield reader.line_num, None, str(exc)
+
+
+def run(input_path: str, delimiter: str = ',', drop_columns=DROP_COLUMNS, batch_size: int = 1000,
+        rejects_path: str = None, clean_output: str = None, dry_run: bool = False) -> int:
+    # No seeding: the target should hold exactly what the file contains
+    repository = None if dry_run else get_repository(seed=False)
+    conn = repository.connect() if repository else None
+    cursor = conn.cursor() if conn else None
+    rejects_file = open(rejects_path, 'w', encoding='utf-8', newline='') if rejects_path else None
+    rejects = csv.writer(rejects_file) if rejects_file else None
+    if rejects:
+        rejects.writerow(['line', 'error'])
+    clean_file = open(clean_output, 'w', encoding='utf-8', newline='') if clean_output else None
+    clean = csv.writer(clean_file, delimiter='|', quotechar='"', quoting=csv.QUOTE_MINIMAL) if clean_file else None
+    if clean:
+        clean.writerow(PROGRAM_COLUMNS)
+
+    seen_ids = set()
+    batch, loaded, rejected = [], 0, 0
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal batch, loaded
+        if cursor and batch:
+            repository.upsert_programs(cursor, batch)
+            conn.commit()
+        loaded += len(batch)
+        batch = []
+        elapsed = time.perf_counter() - start
+        print(f"  {loaded} rows loaded, {rejected} rejected | {loaded / elapsed if elapsed else 0:.0f} rows/sec", file=sys.stderr)
+
+    try:
+        for line_no, row, error in read_rows(input_path, delimiter, set(drop_columns)):
+            if row is not None and row[0] in seen_ids:
+                error = f"duplicate program_id {row[0]}"
+            if error:
+                rejected += 1
+                print(f"⚠️ Line {line_no}: {error}", file=sys.stderr)
+                if rejects:
+                    rejects.writerow([line_no, error])
+                continue
+            seen_ids.add(row[0])
+            batch.append(row)
+            if clean:
+                clean.writerow(['' if v is None else v for v in row])
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        if cursor:
+            removed = repository.program_ids(cursor) - seen_ids
+            if removed and rejected:
+                # A rejected line may be one of these programs; don't drop it over a bad scrape
+                print(f"⚠️ {len(removed)} programs missing from the file were kept because {rejected} lines were rejected")
+            elif removed:
+                print(f"🗑️ Removing {len(removed)} programs missing from the file")
+                repository.delete_programs(cursor, sorted(removed))
+            # Cached catalog snapshots (Streamlit, batch workers) reload on the next request
+            repository.bump_catalog_version(cursor)
+            conn.commit()
+    except Exception as e:
+        print(f"❌ Error after {loaded} committed rows: {str(e)} - re-run to complete the load")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+            conn.close()
+        for f in (clean_file, rejects_file):
+            if f:
+                f.close()
+
+    elapsed = time.perf_counter() - start
+    target = 'validated (dry run)' if dry_run else f"loaded into {repository.dialect}"
+    print(f"✅ {loaded} programs {target}, {rejected} rejected, in {elapsed:.1f}s "
+          f"({loaded / elapsed if elapsed else 0:.0f} rows/sec)")
+    if loaded and not dry_run:
+        print("   Next: python nlpParser.py to parse new or modified requirements")
+    return loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a raw program export and upsert it into the configured database "
+                                                 "(SMARTSCHOLAR_DB), streaming in batched transactions.")
+    parser.add_argument('input', nargs='?', default=os.path.join(ROOT_DIR, 'dataset.csv'), help="Raw CSV export")
+    parser.add_argument('--delimiter', default=',')
+    parser.add_argument('--drop', nargs='*', default=DROP_COLUMNS, help="Column names to discard")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Rows per insert batch and transaction")
+    parser.add_argument('--rejects', help="Write rejected lines and reasons to this CSV")
+    parser.add_argument('--clean-output', help="Also write the cleaned rows as a '|'-delimited file")
+    parser.add_argument('--dry-run', action='store_true', help="Validate only; do not touch the database")
+    args = parser.parse_args(argv)
+    run(args.input, args.delimiter, args.drop, args.batch_size, args.rejects, args.clean_output, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
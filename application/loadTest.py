@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import nlpParser
+from batchMatch import _to_profile
+from matchService import local_matcher
+from programRepository import PROGRAM_COLUMNS, ROOT_DIR
+
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, 'artifacts', 'load_results.json')
+DEFAULT_LEVELS = [1, 2, 4, 8, 16, 32]
+
+# (field as students type it, weight): common degrees dominate, with the usual spelling variants
+FIELDS = [
+    ('Bachelors in Computer Science', 14), ('BSc Computer Science', 8), ('Software Engineering', 6),
+    ('Electrical Engineering', 6), ('Mechanical Engineering', 6), ('Civil Engineering', 4),
+    ('Bachelors in Business Administration', 8), ('BBA', 3), ('Economics', 6), ('BSc Physics', 3),
+    ('Mathematics', 3), ('Biology', 4), ('Biotechnology', 3), ('Bachelors in Psychology', 4),
+    ('Law', 3), ('Environmental Science', 4), ('Public Health', 3), ('Data Science', 5),
+    ('International Relations', 3), ('English Literature', 2), ('Architecture', 2),
+]
+SCALES = [(4.0, 0.65), (10.0, 0.25), (5.0, 0.10)]
+
+
+def random_profiles(n: int, seed: int = 0) -> list:
+    """Student profiles drawn from a rough applicant distribution (fields, grade scales, test mix)."""
+    rng = np.random.default_rng(seed)
+    names, weights = zip(*FIELDS)
+    fields = rng.choice(names, n, p=np.array(weights) / sum(weights))
+    scales = rng.choice([s for s, _ in SCALES], n, p=[p for _, p in SCALES])
+    fractions = np.clip(rng.normal(0.78, 0.09, n), 0.45, 1.0)
+    tests = rng.choice(['ielts', 'toefl', 'none'], n, p=[0.55, 0.30, 0.15])
+    ielts = rng.choice([5.5, 6.0, 6.5, 7.0, 7.5, 8.0], n, p=[0.05, 0.2, 0.3, 0.25, 0.15, 0.05])
+    toefl = np.clip(rng.normal(92, 10, n).round(), 60, 120)
+    experience = np.minimum(rng.geometric(0.55, n) - 1, 10)
+    return [
+        {'field': str(f), 'cgpa': round(float(fr * s), 2), 'cgpa_scale': float(s),
+         'ielts': float(i) if t == 'ielts' else 0.0, 'toefl': float(tf) if t == 'toefl' else 0.0,
+         'work_experience': int(e)}
+        for f, s, fr, t, i, tf, e in zip(fields, scales, fractions, tests, ielts, toefl, experience)
+    ]
+
+
+def load_matcher(dataset_path: str, programs: int):
+    """local_matcher (in-memory SQLite, stub encoder), optionally grown to `programs` synthetic programs."""
+    matcher = local_matcher(dataset_path)
+    if programs:
+        from benchmarks import REQUIREMENT_COLUMNS, synthetic_catalog
+
+        df = synthetic_catalog(matcher.repository.get_catalog()[0], programs)
+        df = df.astype(object).where(df.notna(), None)
+        requirements = df[['program_id'] + REQUIREMENT_COLUMNS + ['requirement_text_raw']].to_dict('records')
+        repository = matcher.repository
+        with repository.connection() as conn:
+            cursor = conn.cursor()
+            repository.delete_catalog(cursor)
+            repository.insert_programs(cursor, df[PROGRAM_COLUMNS].values.tolist())
+            cursor.executemany(nlpParser.INSERT_SQL, [nlpParser._insert_params(r) for r in requirements])
+            repository.bump_catalog_version(cursor)
+            conn.commit()
+            cursor.close()
+    return matcher
+
+
+class RssSampler:
+    """Samples this process's resident set size in the background and keeps the peak (bytes)."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current() -> int:
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss
+        except ImportError:
+            pass
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            import resource  # lifetime peak only; ru_maxrss is KiB on Linux, bytes on macOS
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return rss if sys.platform == 'darwin' else rss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def submit(matcher, profile: dict, pdf, cached: bool):
+    """What one click on "Find Programs" (plus the PDF report) costs the server."""
+    matcher.get_all_programs()
+    results = (matcher.rank_programs_cached(profile) if cached else matcher.rank_programs(profile)).to_dict('records')
+    if pdf is not None:
+        pdf(profile, results)
+    return results
+
+
+def run_level(matcher, profiles: list, sessions: int, duration: float, think: float, pdf, cached: bool) -> dict:
+    """Runs `sessions` closed-loop simulated users for `duration` seconds; keeps the first error's traceback."""
+    latencies, errors, failures = [], [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def session(index: int):
+        rng = np.random.default_rng(index)
+        own, own_errors = [], 0
+        while time.perf_counter() < deadline:
+            profile = profiles[int(rng.integers(len(profiles)))]
+            start = time.perf_counter()
+            try:
+                submit(matcher, profile, pdf, cached)
+            except Exception:
+                own_errors += 1
+                with lock:
+                    if not failures:
+                        failures.append(traceback.format_exc())
+                continue
+            own.append(time.perf_counter() - start)
+            if think:
+                time.sleep(rng.exponential(think))
+        with lock:
+            latencies.extend(own)
+            errors.append(own_errors)
+
+    with RssSampler() as rss:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'sessions': sessions, 'requests': len(latencies), 'errors': int(sum(errors)),
+        'throughput_rps': len(latencies) / elapsed, 'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)), 'p99_ms': float(np.percentile(ms, 99)), 'max_ms': float(ms.max()),
+        'peak_rss_mib': rss.peak / 2 ** 20, 'first_error': failures[0] if failures else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent advisors against the matcher (local SQLite catalog, "
+                                                 "stub encoder) and report throughput, latency percentiles and peak RSS.")
+    parser.add_argument('--dataset', default=os.path.join(ROOT_DIR, 'dataset_clean.csv'))
+    parser.add_argument('--programs', type=int, default=0, help="Grow the catalog to this many synthetic programs")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_LEVELS, help="Simulated sessions per level")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="Mean pause between a session's requests (0 = closed loop)")
+    parser.add_argument('--profiles', help="Replay profiles from a cohort CSV (batchMatch columns) instead of sampling")
+    parser.add_argument('--distinct', type=int, default=2000, help="Sampled profiles to draw requests from")
+    parser.add_argument('--no-pdf', action='store_true', help="Skip the PDF build")
+    parser.add_argument('--uncached', action='store_true', help="Rank every request (bypass the shared result cache)")
+    parser.add_argument('--p99-budget', type=float, default=1000.0, help="p99 (ms) a level must stay under to count as served")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Results JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    matcher = load_matcher(args.dataset, args.programs)
+    catalog = matcher.get_all_programs()
+    print(f"✓ Local matcher ready: {len(catalog)} programs in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    if args.profiles:
+        profiles = [_to_profile(r) for r in pd.read_csv(args.profiles).to_dict('records')]
+    else:
+        profiles = random_profiles(args.distinct)
+
+    pdf = None
+    if not args.no_pdf:
+        try:
+            from reportPdf import cached_pdf
+            pdf = cached_pdf
+        except ImportError as exc:
+            print(f"⚠️ fpdf unavailable ({exc}); running without the PDF build", file=sys.stderr)
+
+    levels = []
+    print(f"{'sessions':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'peak RSS':>10}")
+    for sessions in args.concurrency:
+        level = run_level(matcher, profiles, sessions, args.duration, args.think_ms / 1000, pdf, not args.uncached)
+        levels.append(level)
+        print(f"{sessions:>8} {level['throughput_rps']:>9.1f} {level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} "
+              f"{level['p99_ms']:>9.1f} {level['errors']:>7} {level['peak_rss_mib']:>7.0f} MiB")
+        if level['first_error']:
+            print(f"⚠️ First error at {sessions} sessions:\n{level['first_error']}", file=sys.stderr)
+
+    served = [level['sessions'] for level in levels if level['p99_ms'] <= args.p99_budget and not level['errors']]
+    if served:
+        print(f"✅ Up to {max(served)} concurrent sessions stay under p99 {args.p99_budget:.0f} ms")
+    else:
+        print(f"❌ No level stays under p99 {args.p99_budget:.0f} ms")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'), 'programs': len(catalog),
+            'settings': {k: v for k, v in vars(args).items() if k != 'output'}, 'pdf': pdf is not None,
+            'max_sessions_within_budget': max(served) if served else 0, 'levels': levels,
+        }, f, indent=2)
+    print(f"✓ Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
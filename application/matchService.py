@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import embeddingStore
+import metrics
+import nlpParser
+import requestProfiler
+from batchMatch import _json_default, _to_profile
+from MatchingAlgo import MatchingAlgorithm, get_shared_matcher
+from programRepository import ROOT_DIR, SqliteRepository
+from requirementExtractor import extract_requirements
+
+MAX_BODY = 64 * 1024
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, close: bool = False):
+        super().__init__(message)
+        self.status = status
+        # The request body could not be framed, so the connection cannot be reused
+        self.close = close
+
+
+class EncodeBatcher:
+    """Gathers student fields that arrive within max_wait seconds and encodes them in one call.
+
+    Requests wait in a bounded queue; when it is full, submit() raises asyncio.QueueFull so the
+    caller can shed load instead of letting latency grow without bound.
+    """
+
+    def __init__(self, matcher: MatchingAlgorithm, max_batch: int = 64, max_wait: float = 0.005, queue_size: int = 1024):
+        self.matcher = matcher
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue(queue_size)
+        # One encode at a time: the model already uses every core for a batch
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encode')
+        self.batches = self.items = 0
+
+    def submit(self, field: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((field, future))
+        return future
+
+    def _encode(self, fields):
+        embs = self.matcher.encode_texts(fields)
+        domains = self.matcher.infer_domain_many(fields, embs)
+        return {f: (emb, domain) for f, emb, domain in zip(fields, embs, domains)}
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            fields = list(dict.fromkeys(field for field, _ in batch))
+            self.batches += 1
+            self.items += len(batch)
+            metrics.observe('service_batch_size', len(batch), metrics.SIZE_BUCKETS)
+            try:
+                encoded = await loop.run_in_executor(self.executor, self._encode, fields)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for field, future in batch:
+                if not future.done():
+                    future.set_result(encoded[field])
+
+    def stats(self) -> dict:
+        return {'batches': self.batches, 'requests': self.items, 'queued': self.queue.qsize(),
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0}
+
+
+class MatchService:
+    """JSON over HTTP/1.1 (keep-alive) in front of one shared MatchingAlgorithm."""
+
+    def __init__(self, matcher: MatchingAlgorithm, max_batch: int = 64, max_wait_ms: float = 5.0,
+                 queue_size: int = 1024, rank_threads: int = 2, default_top_k: int = 10):
+        self.matcher = matcher
+        self.batcher = EncodeBatcher(matcher, max_batch, max_wait_ms / 1000, queue_size)
+        self.rank_executor = ThreadPoolExecutor(max_workers=rank_threads, thread_name_prefix='rank')
+        self.default_top_k = default_top_k
+        self.rejected = 0
+
+    async def rank(self, body: bytes) -> dict:
+        try:
+            request = json.loads(body or b'{}', parse_constant=_reject_constant)
+            profile = _to_profile(request, required=('cgpa',))
+            top_k = int(request.get('top_k', self.default_top_k))
+        except (ValueError, TypeError, AttributeError) as exc:
+            raise HttpError(400, f"Invalid profile: {exc}")
+        if profile['cgpa_scale'] <= 0 or top_k < 1:
+            raise HttpError(400, "cgpa_scale and top_k must be positive")
+
+        loop = asyncio.get_running_loop()
+        # Samples the executor threads doing this request's work (the shared encode batch is not attributed)
+        capture = requestProfiler.request('service_rank')
+        try:
+            key, normalized, df = await loop.run_in_executor(self.rank_executor, capture.watch(self.matcher.result_cache_entry), profile)
+            capture.tag(programs=len(df), catalog_version=key[0])
+            result = self.matcher.result_cache.get(key)
+            if result is None:
+                try:
+                    future = self.batcher.submit(normalized['field'])
+                except asyncio.QueueFull:
+                    self.rejected += 1
+                    metrics.inc('service_rejected')
+                    raise HttpError(503, "Encode queue full, retry later")
+                emb, domain = await future
+                result = await loop.run_in_executor(self.rank_executor, capture.watch(self.matcher.rank_programs),
+                                                    normalized, df, emb, domain)
+                self.matcher.result_cache.put(key, result)
+        finally:
+            capture.close()
+        return {'catalog_version': self.matcher.catalog_version, 'results': result.head(top_k).to_dict('records')}
+
+    def stats(self) -> dict:
+        """Runs off the event loop: the catalog version query and the embedding cache's SQLite count block."""
+        return {'batcher': self.batcher.stats(), 'rejected': self.rejected, 'result_cache': self.matcher.result_cache.stats(),
+                'embedding_cache': self.matcher.text_cache.stats(), 'programs': len(self.matcher.get_all_programs())}
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        path = path.split('?', 1)[0]
+        if path == '/rank':
+            if method != 'POST':
+                raise HttpError(405, "Use POST")
+            with metrics.timer('service_rank'):
+                return 200, await self.rank(body), 'application/json'
+        if method != 'GET':
+            raise HttpError(405, "Use GET")
+        if path == '/health':
+            return 200, {'status': 'ok', 'catalog_version': self.matcher.catalog_version}, 'application/json'
+        if path == '/stats':
+            return 200, await asyncio.get_running_loop().run_in_executor(self.rank_executor, self.stats), 'application/json'
+        if path == '/metrics':
+            return 200, metrics.to_prometheus(), 'text/plain; version=0.0.4'
+        raise HttpError(404, f"No route for {path}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    status, payload, content_type = await self.dispatch(method, path, body)
+                except HttpError as exc:
+                    keep_alive = exc.status < 500 and not exc.close
+                    status, payload, content_type = exc.status, {'error': str(exc)}, 'application/json'
+                except Exception as exc:
+                    keep_alive = False
+                    status, payload, content_type = 500, {'error': repr(exc)}, 'application/json'
+                writer.write(_response(status, payload, content_type, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        batcher = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"✅ Matching service on http://{host}:{port} ({len(self.matcher.get_all_programs())} programs)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+def _reject_constant(name: str):
+    # json.loads accepts the non-standard NaN / Infinity literals by default
+    raise ValueError(f"{name} is not a number")
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    raw_length = headers.get('content-length')
+    if raw_length is None:
+        if method.upper() == 'POST':
+            raise HttpError(400, "Content-Length required", close=True)
+        raw_length = '0'
+    try:
+        length = int(raw_length)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HttpError(400, f"Invalid Content-Length '{raw_length}'", close=True)
+    if length > MAX_BODY:
+        raise HttpError(413, f"Body larger than {MAX_BODY} bytes", close=True)
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path, headers, body
+
+
+def _response(status: int, payload, content_type: str, keep_alive: bool) -> bytes:
+    if isinstance(payload, str):
+        body = payload.encode('utf-8')
+    else:
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n")
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    return (head + "\r\n").encode('latin-1') + body
+
+
+_local_artifacts = None
+
+
+def local_matcher(dataset_path: str) -> MatchingAlgorithm:
+    """Self-contained matcher: in-memory SQLite catalog with regex-extracted requirements and the stub encoder.
+
+    Its artifacts (stub embeddings, embedding cache) go to a temporary directory removed at exit,
+    never next to the real model's where they would count against KEEP_ARTIFACTS.
+    """
+    global _local_artifacts
+    from stubEncoder import StubEncoder
+
+    if _local_artifacts is None:
+        _local_artifacts = tempfile.TemporaryDirectory(prefix='smartscholar-local-')
+    embeddingStore.ARTIFACT_DIR = _local_artifacts.name
+    repository = SqliteRepository(':memory:')
+    repository.load_csv(dataset_path)
+    df, _ = repository.get_catalog()
+    requirements = [extract_requirements(int(pid), text) for pid, text in zip(df['program_id'], df['requirement_text_raw'])]
+    with repository.connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(nlpParser.INSERT_SQL, [nlpParser._insert_params(r) for r in requirements if r])
+        repository.bump_catalog_version(cursor)
+        conn.commit()
+        cursor.close()
+    return MatchingAlgorithm(repository, encoder=StubEncoder())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON matching service with micro-batched field encoding.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--local', action='store_true',
+                        help="No database or model download: in-memory SQLite catalog and the stub encoder")
+    parser.add_argument('--dataset', default=os.path.join(ROOT_DIR, 'dataset_clean.csv'), help="Catalog for --local")
+    parser.add_argument('--max-batch', type=int, default=64, help="Most fields per encode call")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="How long the first request waits for others")
+    parser.add_argument('--queue-size', type=int, default=1024, help="Queued encodes before requests get 503")
+    parser.add_argument('--rank-threads', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    matcher = local_matcher(args.dataset) if args.local else get_shared_matcher()
+    matcher.get_all_programs()
+    service = MatchService(matcher, args.max_batch, args.max_wait_ms, args.queue_size, args.rank_threads)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Off unless SMARTSCHOLAR_METRICS is set; every recording call then returns immediately
+ENABLED = os.environ.get('SMARTSCHOLAR_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+METRICS_FILE = os.environ.get('SMARTSCHOLAR_METRICS_FILE')
+PREFIX = 'smartscholar_'
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total, out = 0, []
+        for bound, n in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms, keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view: {'counters': {name: {labels: value}}, 'histograms': {name: {labels: stats}}}."""
+        with self._lock:
+            counters, histograms = {}, {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.setdefault(name, {})[_label_text(labels)] = value
+            for (name, labels), hist in sorted(self.histograms.items()):
+                histograms.setdefault(name, {})[_label_text(labels)] = {
+                    'count': hist.count, 'sum': hist.sum, 'mean': hist.sum / hist.count if hist.count else 0.0,
+                    'buckets': {str(bound): n for bound, n in hist.cumulative()},
+                }
+        return {'timestamp': time.time(), 'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (e.g. for the node_exporter textfile collector)."""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{PREFIX}{name}_total"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{_prom_labels(labels)} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                metric = PREFIX + name
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                for bound, n in hist.cumulative():
+                    lines.append(f"{metric}_bucket{_prom_labels(labels + (('le', str(bound)),))} {n}")
+                lines.append(f"{metric}_sum{_prom_labels(labels)} {hist.sum}")
+                lines.append(f"{metric}_count{_prom_labels(labels)} {hist.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Writes a .json snapshot, or Prometheus text for any other extension (atomically replaced)."""
+        body = json.dumps(self.snapshot(), indent=2) if path.lower().endswith('.json') else self.to_prometheus()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+
+def _label_text(labels) -> str:
+    return ','.join(f"{k}={v}" for k, v in labels)
+
+
+def _prom_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRY.observe('stage_seconds', time.perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage: str):
+    """`with metrics.timer('encode'):` records the block's latency under stage_seconds{stage=...}."""
+    return _Timer(stage) if ENABLED else _NULL_TIMER
+
+
+def timed(stage: str):
+    """Decorator form of timer()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def inc(name: str, value: float = 1, **labels):
+    if ENABLED:
+        REGISTRY.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, buckets=LATENCY_BUCKETS, **labels):
+    if ENABLED:
+        REGISTRY.observe(name, value, buckets, **labels)
+
+
+def cache(name: str, hit: bool):
+    """Counts a lookup in cache_requests_total{cache=name, result=hit|miss}."""
+    if ENABLED:
+        REGISTRY.inc('cache_requests', cache=name, result='hit' if hit else 'miss')
+
+
+def enable(flag: bool = True):
+    global ENABLED
+    ENABLED = flag
+
+
+def snapshot() -> dict:
+    return REGISTRY.snapshot()
+
+
+def to_prometheus() -> str:
+    return REGISTRY.to_prometheus()
+
+
+def write(path: str = None):
+    """Exports to `path` (default SMARTSCHOLAR_METRICS_FILE); does nothing when disabled or no path is set."""
+    path = path or METRICS_FILE
+    if ENABLED and path:
+        REGISTRY.write(path)
+
+
+if ENABLED and METRICS_FILE:
+    atexit.register(write)
@@ -1,22 +1,28 @@
-import spacy
+import argparse
+import hashlib
+import json
 import pandas as pd
-import pyodbc
 import re
+import time
 from datetime import datetime
+from programRepository import get_repository
+from requirementExtractor import extract_with_sources, parsing_confidence
 
-# Load spaCy model
-print("Loading spaCy NLP model...")
-nlp = spacy.load("en_core_web_sm")
-print("✓ spaCy model loaded!")
+# The extractors only read doc.ents; NER in en_core_web_sm carries its own tok2vec,
+# so every other component can be switched off
+UNUSED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"]
 
-# SQL Server Connection
-conn = pyodbc.connect(
-    'Driver={ODBC Driver 17 for SQL Server};'
-    'Server=DESKTOP-2G14Q4N\\MSSQLSERVER01;'
-    'Database=SmartScholar;'
-    'Trusted_Connection=yes;'
-)
-cursor = conn.cursor()
+_nlp = None
+
+def get_nlp():
+    """Load the spaCy model on first use so importing this module has no side effects"""
+    global _nlp
+    if _nlp is None:
+        import spacy
+        print("Loading spaCy NLP model...")
+        _nlp = spacy.load("en_core_web_sm", disable=UNUSED_COMPONENTS)
+        print("✓ spaCy model loaded!")
+    return _nlp
 
 
 # ==================== SPACY-BASED PARSERS ====================
@@ -190,16 +196,14 @@ def parse_english_required_spacy(doc, text):
     
     return 0
 
-def parse_requirement_row_spacy(program_id, requirement_text, program_name=""):
-    """Parse requirement using spaCy NLP"""
+def parse_requirement_doc(program_id, doc, requirement_text):
+    """Extract all requirement fields by running each parser above separately.
     
-    if not requirement_text:
-        return None
+    Reference implementation for requirementExtractor.extract_requirements, which the
+    pipeline uses; kept for regression checks and benchExtractor.py.
+    """
     
     try:
-        # Process text with spaCy
-        doc = nlp(requirement_text)
-        
         # Extract all components
         min_toefl, toefl_conf = parse_toefl_spacy(doc, requirement_text)
         min_ielts, ielts_conf = parse_ielts_spacy(doc, requirement_text)
@@ -232,126 +236,261 @@ def parse_requirement_row_spacy(program_id, requirement_text, program_name=""):
         print(f"❌ Error parsing program {program_id}: {str(e)}")
         return None
 
+def parse_requirement_row_spacy(program_id, requirement_text, program_name=""):
+    """Parse requirement using spaCy NLP"""
+    
+    if not requirement_text:
+        return None
+    
+    return parse_requirement_text(program_id, get_nlp()(requirement_text), requirement_text)
 
-# ==================== MAIN EXECUTION ====================
+def _tiers_json(sources):
+    return json.dumps(sources, sort_keys=True)
 
-try:
-    print("\n📖 Reading programs from SmartScholar database...")
+def parse_requirement_text(program_id, doc, requirement_text):
+    """Single-pass extraction (see requirementExtractor.py), with the tier that produced each field"""
+    try:
+        extracted = extract_with_sources(program_id, requirement_text, doc)
+    except Exception as e:
+        print(f"❌ Error parsing program {program_id}: {str(e)}")
+        return None
+    if extracted is None:
+        return None
+    result, _, sources, _ = extracted
+    result['extraction_tiers'] = _tiers_json(sources)
+    return result
+
+def parse_requirements_batched(rows, batch_size=64, n_process=1):
+    """Stream (program_id, requirement_text) rows through nlp.pipe and yield parsed requirement dicts"""
+    rows = [(pid, text) for pid, text in rows if text]
+    texts = (text for _, text in rows)
     
-    # Read all programs WITH requirement text
-    query = """
-    SELECT program_id, program_name, requirement_text_raw 
-    FROM EmjmdPrograms 
-    WHERE requirement_text_raw IS NOT NULL
-    """
-    programs_df = pd.read_sql(query, conn)
+    for (program_id, text), doc in zip(rows, get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process)):
+        parsed = parse_requirement_text(program_id, doc, text)
+        if parsed:
+            yield parsed
+
+# A CGPA / work-experience value below this confidence (regex finds score 0.85, entities 0.90),
+# or missing while the text mentions it, sends the row to the NER tier
+NER_THRESHOLD = 0.85
+
+def parse_requirements_tiered(rows, batch_size=64, n_process=1, threshold=NER_THRESHOLD, stats=None):
+    """Tier 1: regex/keyword extraction for every row. Tier 2: spaCy NER, loaded on first use, only for
+    rows where a field that reads entities is missing or below threshold; other fields keep tier 1.
     
-    print(f"✓ Found {len(programs_df)} programs with requirement text")
+    `stats`, if given, receives the number of rows finished by each tier.
+    """
+    counts = {'regex': 0, 'ner': 0}
+    retry = []
+    for program_id, text in rows:
+        if not text:
+            continue
+        try:
+            extracted = extract_with_sources(program_id, text)
+        except Exception as e:
+            print(f"❌ Error parsing program {program_id}: {str(e)}")
+            continue
+        result, confidences, sources, context = extracted
+        weak = [name for name in sorted(context) if confidences[name] < threshold]
+        if weak:
+            retry.append((program_id, text, extracted, weak))
+            continue
+        counts['regex'] += 1
+        result['extraction_tiers'] = _tiers_json(sources)
+        yield result
+    
+    docs = get_nlp().pipe((text for _, text, _, _ in retry), batch_size=batch_size, n_process=n_process) if retry else []
+    for (program_id, text, (result, confidences, sources, _), weak), doc in zip(retry, docs):
+        try:
+            ner_result, ner_confidences, ner_sources, _ = extract_with_sources(program_id, text, doc)
+        except Exception as e:
+            print(f"❌ Error parsing program {program_id} with spaCy: {str(e)} - keeping the regex result")
+            ner_result, ner_confidences, ner_sources = result, confidences, sources
+        for name in weak:
+            if ner_confidences[name] > confidences[name]:
+                result[name], confidences[name] = ner_result[name], ner_confidences[name]
+                sources[name] = ner_sources[name]
+        result['parsing_confidence'] = parsing_confidence(confidences)
+        result['extraction_tiers'] = _tiers_json(sources)
+        counts['ner'] += 1
+        yield result
+    if stats is not None:
+        stats.update(counts)
+
+
+# ==================== MAIN EXECUTION ====================
+
+# Bump when requirementExtractor's rules change so the next run re-parses every program
+PARSER_VERSION = 2
+EXTRACTION_MODES = ('tiered', 'ner')
+
+INSERT_SQL = """
+INSERT INTO ProgramRequirements 
+(program_id, min_toefl_score, min_ielts_score, min_cambridge_score, min_cgpa, 
+ cgpa_scale, english_required, work_experience_years, accepted_degree_fields, 
+ requirement_text_raw, parsing_confidence, extraction_tiers, content_hash)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _insert_params(req):
+    return (
+        req['program_id'],
+        req['min_toefl_score'],
+        req['min_ielts_score'],
+        req['min_cambridge_score'],
+        req['min_cgpa'],
+        req['cgpa_scale'],
+        req['english_required'],
+        req['work_experience_years'],
+        req['accepted_degree_fields'],
+        req['requirement_text_raw'],
+        req['parsing_confidence'],
+        req.get('extraction_tiers'),
+        req.get('content_hash')
+    )
+
+def content_hash(program_name, field, requirement_text, variant=''):
+    """Change-detection hash over the columns that feed requirement parsing and program embeddings.
     
-    # Parse each program using spaCy
-    parsed_requirements = []
+    `variant` names the extraction settings, so switching them re-parses the affected rows.
+    """
+    h = hashlib.sha256(f"v{PARSER_VERSION}:{variant}".encode('utf-8'))
+    for value in (program_name, field, requirement_text):
+        h.update(b"\x1e" + ('' if value is None else str(value)).encode('utf-8'))
+    return h.hexdigest()
+
+def plan_changes(programs_df, stored_hashes, variant=''):
+    """Returns ({program_id: hash} to (re)parse, [program_ids] whose requirements should be removed, unchanged count)"""
+    current = {}
+    for pid, name, field, text in zip(programs_df['program_id'], programs_df['program_name'],
+                                      programs_df['field'], programs_df['requirement_text_raw']):
+        if text:
+            current[int(pid)] = content_hash(name, field, text, variant)
+    changed = {pid: digest for pid, digest in current.items() if stored_hashes.get(pid) != digest}
+    removed = [pid for pid in stored_hashes if pid not in current]
+    return changed, removed, len(current) - len(changed)
+
+def main(batch_size=64, n_process=1, full=False, mode='tiered', threshold=NER_THRESHOLD):
+    # Database connection (SQL Server by default, or SQLite via SMARTSCHOLAR_DB)
+    repository = get_repository()
+    conn = repository.connect()
+    cursor = conn.cursor()
+    if hasattr(cursor, 'fast_executemany'):
+        cursor.fast_executemany = True  # pyodbc: send each batch as one parameter array
     
-    for idx, row in programs_df.iterrows():
-        program_id = row['program_id']
-        requirement_text = row['requirement_text_raw']
-        program_name = row['program_name']
+    try:
+        print("\n📖 Reading programs from SmartScholar database...")
         
-        parsed = parse_requirement_row_spacy(program_id, requirement_text, program_name)
+        query = """
+        SELECT program_id, program_name, field, requirement_text_raw 
+        FROM EmjmdPrograms
+        """
+        programs_df = pd.read_sql(query, conn)
         
-        if parsed:
-            parsed_requirements.append(parsed)
+        # ==================== CHANGE DETECTION ====================
+        
+        stored_hashes = None if full else repository.requirement_hashes()
+        if stored_hashes is None:
+            # First run, --full, or a table created before content hashes: rebuild from scratch
+            print("\n🔨 Recreating ProgramRequirements table...")
+            repository.recreate_requirements_table(cursor)
+            conn.commit()
+            stored_hashes = {}
+        
+        variant = f"tiered:{threshold}" if mode == 'tiered' else mode
+        changed, removed, unchanged = plan_changes(programs_df, stored_hashes, variant)
+        print(f"✓ {len(changed)} new or modified, {unchanged} unchanged, {len(removed)} removed")
+        
+        if not changed and not removed:
+            print("\n✅ Requirements are up to date; catalog version left unchanged.")
+            return
+        
+        # ==================== PARSE + UPSERT ====================
+        
+        if mode == 'tiered':
+            print(f"\n📤 Parsing with regex, then spaCy below confidence {threshold} (batch_size={batch_size}, "
+                  f"n_process={n_process}), and upserting per batch...")
+        else:
+            print(f"\n📤 Parsing with spaCy (batch_size={batch_size}, n_process={n_process}) and upserting per batch...")
+        
+        start = time.perf_counter()
+        texts = dict(zip(programs_df['program_id'].astype(int), programs_df['requirement_text_raw']))
+        rows = [(pid, texts[pid]) for pid in changed]
+        if removed:
+            repository.replace_requirements(cursor, removed, INSERT_SQL, [])
+        batch = []
+        upserted = 0
+        
+        def flush():
+            nonlocal batch, upserted
+            repository.replace_requirements(cursor, [params[0] for params in batch], INSERT_SQL, batch)
+            upserted += len(batch)
+            batch = []
+        
+        tier_counts = {}
+        if mode == 'tiered':
+            parsed_rows = parse_requirements_tiered(rows, batch_size, n_process, threshold, tier_counts)
+        else:
+            parsed_rows = parse_requirements_batched(rows, batch_size, n_process)
+        for parsed in parsed_rows:
+            parsed['content_hash'] = changed[parsed['program_id']]
+            batch.append(_insert_params(parsed))
             
             # Print progress
             toefl = parsed['min_toefl_score'] or 'N/A'
             ielts = parsed['min_ielts_score'] or 'N/A'
             cgpa = parsed['min_cgpa'] or 'N/A'
             conf = parsed['parsing_confidence']
+            print(f"✓ Program {parsed['program_id']}: TOEFL={toefl}, IELTS={ielts}, CGPA={cgpa}, Confidence={conf:.2f}")
             
-            print(f"✓ Program {program_id}: TOEFL={toefl}, IELTS={ielts}, CGPA={cgpa}, Confidence={conf:.2f}")
-    
-    print(f"\n✅ Successfully parsed {len(parsed_requirements)} programs using spaCy NLP!")
-    
-    # ==================== RECREATE TABLE ====================
-    
-    print("\n🔨 Dropping old ProgramRequirements table...")
-    
-    drop_sql = "IF OBJECT_ID('dbo.ProgramRequirements', 'U') IS NOT NULL DROP TABLE dbo.ProgramRequirements;"
-    cursor.execute(drop_sql)
-    conn.commit()
-    
-    print("🔨 Creating new ProgramRequirements table...")
-    
-    create_table_sql = """
-    CREATE TABLE ProgramRequirements (
-        requirement_id INT PRIMARY KEY IDENTITY(1,1),
-        program_id INT NOT NULL,
-        min_toefl_score INT,
-        min_ielts_score DECIMAL(3,1),
-        min_cambridge_score NVARCHAR(10),
-        min_cgpa DECIMAL(3,2),
-        cgpa_scale DECIMAL(3,1),
-        english_required BIT,
-        work_experience_years INT,
-        accepted_degree_fields NVARCHAR(MAX),
-        requirement_text_raw NVARCHAR(MAX),
-        parsing_confidence DECIMAL(3,2),
-        created_at DATETIME DEFAULT GETDATE(),
-        FOREIGN KEY (program_id) REFERENCES EmjmdPrograms(program_id)
-    );
-    """
-    
-    cursor.execute(create_table_sql)
-    conn.commit()
-    print("✓ Table created successfully!")
-    
-    # ==================== INSERT PARSED DATA ====================
-    
-    print("\n📤 Inserting spaCy-parsed requirements into database...")
-    
-    insert_sql = """
-    INSERT INTO ProgramRequirements 
-    (program_id, min_toefl_score, min_ielts_score, min_cambridge_score, min_cgpa, 
-     cgpa_scale, english_required, work_experience_years, accepted_degree_fields, 
-     requirement_text_raw, parsing_confidence)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """
-    
-    for req in parsed_requirements:
-        cursor.execute(insert_sql, (
-            req['program_id'],
-            req['min_toefl_score'],
-            req['min_ielts_score'],
-            req['min_cambridge_score'],
-            req['min_cgpa'],
-            req['cgpa_scale'],
-            req['english_required'],
-            req['work_experience_years'],
-            req['accepted_degree_fields'],
-            req['requirement_text_raw'],
-            req['parsing_confidence']
-        ))
-    
-    conn.commit()
-    print(f"✅ Successfully inserted {len(parsed_requirements)} spaCy-parsed requirements!")
-    
-    # ==================== VERIFICATION ====================
-    
-    print("\n🔍 Verification - Sample parsed data (Top 10):")
-    verify_sql = """
-    SELECT TOP 10 program_id, min_toefl_score, min_ielts_score, min_cgpa, 
-                  accepted_degree_fields, parsing_confidence 
-    FROM ProgramRequirements 
-    ORDER BY program_id
-    """
-    verify_df = pd.read_sql(verify_sql, conn)
-    print(verify_df.to_string())
-    
-    print("\n✓ spaCy NLP parsing complete!")
-    
-except Exception as e:
-    print(f"❌ Error: {str(e)}")
-    conn.rollback()
-finally:
-    cursor.close()
-    conn.close()
-    print("\n✓ Database connection closed.")
\ No newline at end of file
+            if len(batch) >= batch_size:
+                flush()
+        
+        if batch:
+            flush()
+        
+        # Cached catalog snapshots (Streamlit, batch workers) reload on the next request
+        repository.bump_catalog_version(cursor)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        print(f"\n✅ Parsed and upserted {upserted} requirements, removed {len(removed)}, "
+              f"in {elapsed:.1f}s ({upserted / elapsed if elapsed else 0:.1f} rows/sec)!")
+        if tier_counts:
+            print(f"✓ {tier_counts['regex']} rows finished by regex, {tier_counts['ner']} sent to spaCy NER")
+        
+        # ==================== VERIFICATION ====================
+        
+        print("\n🔍 Verification - Sample parsed data (Top 10):")
+        # SQL Server has no LIMIT and SQLite no TOP; either way only 10 rows leave the database
+        top, limit = ("TOP 10 ", "") if repository.dialect == 'mssql' else ("", " LIMIT 10")
+        verify_sql = f"""
+        SELECT {top}program_id, min_toefl_score, min_ielts_score, min_cgpa, 
+               accepted_degree_fields, parsing_confidence 
+        FROM ProgramRequirements 
+        ORDER BY program_id{limit}
+        """
+        verify_df = pd.read_sql(verify_sql, conn)
+        print(verify_df.to_string())
+        
+        print("\n✓ spaCy NLP parsing complete!")
+        
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+        print("\n✓ Database connection closed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse new or modified program requirement texts with spaCy and upsert them into ProgramRequirements.")
+    parser.add_argument('--batch-size', type=int, default=64, help="Texts per nlp.pipe batch and rows per bulk insert")
+    parser.add_argument('--n-process', type=int, default=1, help="spaCy worker processes (-1 = all cores)")
+    parser.add_argument('--full', action='store_true', help="Re-parse every program (e.g. after changing the extraction rules)")
+    parser.add_argument('--mode', choices=EXTRACTION_MODES, default='tiered',
+                        help="tiered: regex first, spaCy only for low-confidence rows; ner: spaCy for every row")
+    parser.add_argument('--ner-threshold', type=float, default=NER_THRESHOLD,
+                        help="Tiered mode: CGPA/work-experience confidence below which a row goes to spaCy")
+    args = parser.parse_args()
+    main(args.batch_size, args.n_process, args.full, args.mode, args.ner_threshold)
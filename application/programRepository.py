@@ -0,0 +1,401 @@
+import csv
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+
+import metrics
+
+PROGRAMS_QUERY = (
+    "SELECT ep.*, pr.* FROM EmjmdPrograms ep "
+    "LEFT JOIN ProgramRequirements pr ON ep.program_id = pr.program_id ORDER BY ep.program_id"
+)
+
+PROGRAM_COLUMNS = [
+    'program_id', 'program_name', 'acronym', 'consortium', 'website', 'field', 'degree_requirement',
+    'accepted_fields', 'cgpa_gpa', 'english_requirement', 'english_exemptions', 'work_experience',
+    'application_deadline', 'selection_process', 'scholarship', 'requirement_text_raw'
+]
+
+DEFAULT_MSSQL = (
+    'Driver={ODBC Driver 17 for SQL Server};'
+    'Server=DESKTOP-2G14Q4N\\MSSQLSERVER01;'
+    'Database=SmartScholar;'
+    'Trusted_Connection=yes;'
+)
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+class ConnectionPool:
+    """Small thread-safe pool: connections are created lazily up to `size` and reused."""
+
+    def __init__(self, factory: Callable, size: int = 4):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self.factory()
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            # A failed statement may leave the connection unusable; don't hand it out again
+            self._discard(conn)
+            raise
+        else:
+            self._idle.put(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class ProgramRepository:
+    """Reads the program catalog and keeps an in-memory snapshot, refreshed only when the catalog version changes."""
+
+    dialect = None
+
+    def __init__(self, pool_size: int = 4):
+        self.pool = ConnectionPool(self.connect, pool_size)
+        self._snapshot = None
+        self._snapshot_version = None
+        self._snapshot_lock = threading.Lock()
+
+    def connect(self):
+        """Opens a new, unpooled connection (for scripts that manage their own transaction)."""
+        raise NotImplementedError
+
+    def connection(self):
+        return self.pool.connection()
+
+    def catalog_version(self) -> str:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT meta_value FROM CatalogMeta WHERE meta_key = 'catalog_version'")
+                row = cursor.fetchone()
+                return str(row[0]) if row else '0'
+            finally:
+                cursor.close()
+
+    def bump_catalog_version(self, cursor):
+        """Increments the version stamp that in-memory catalog snapshots are validated against."""
+        raise NotImplementedError
+
+    def fetch_programs(self) -> pd.DataFrame:
+        with self.connection() as conn:
+            df = pd.read_sql(PROGRAMS_QUERY, conn)
+        # ep.* and pr.* both carry program_id / requirement_text_raw; keep the EmjmdPrograms copy
+        return df.loc[:, ~df.columns.duplicated()]
+
+    def get_catalog(self) -> Tuple[pd.DataFrame, str]:
+        """Returns the cached catalog snapshot and its version, re-querying only after a version bump."""
+        with metrics.timer('catalog_version'):
+            version = self.catalog_version()
+        with self._snapshot_lock:
+            stale = self._snapshot is None or version != self._snapshot_version
+            metrics.cache('catalog_snapshot', not stale)
+            if stale:
+                with metrics.timer('fetch_programs'):
+                    self._snapshot = self.fetch_programs()
+                self._snapshot_version = version
+            return self._snapshot, self._snapshot_version
+
+    def invalidate(self):
+        with self._snapshot_lock:
+            self._snapshot = None
+
+    def recreate_requirements_table(self, cursor):
+        raise NotImplementedError
+
+    def requirement_hashes(self) -> Optional[dict]:
+        """program_id -> content_hash of the parsed requirements, or None if the table predates the current columns."""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT program_id, content_hash, extraction_tiers FROM ProgramRequirements")
+                return {int(pid): digest for pid, digest, _ in cursor.fetchall()}
+            except Exception:
+                return None
+            finally:
+                cursor.close()
+
+    def replace_requirements(self, cursor, program_ids, insert_sql: str, rows):
+        """Upserts parsed requirements: drops the current rows of program_ids, then inserts the new ones."""
+        params = [(pid,) for pid in program_ids]
+        if params:
+            cursor.executemany("DELETE FROM ProgramRequirements WHERE program_id = ?", params)
+        if rows:
+            cursor.executemany(insert_sql, rows)
+
+    def program_ids(self, cursor) -> set:
+        cursor.execute("SELECT program_id FROM EmjmdPrograms")
+        return {int(row[0]) for row in cursor.fetchall()}
+
+    def delete_programs(self, cursor, program_ids):
+        """Removes programs and their parsed requirements."""
+        params = [(pid,) for pid in program_ids]
+        if params:
+            cursor.executemany("DELETE FROM ProgramRequirements WHERE program_id = ?", params)
+            cursor.executemany("DELETE FROM EmjmdPrograms WHERE program_id = ?", params)
+
+    def delete_catalog(self, cursor):
+        """Empties both catalog tables (requirements first, for the foreign key)."""
+        cursor.execute("DELETE FROM ProgramRequirements")
+        cursor.execute("DELETE FROM EmjmdPrograms")
+
+    def insert_programs(self, cursor, rows):
+        """Bulk-inserts EmjmdPrograms rows given as value lists in PROGRAM_COLUMNS order."""
+        placeholders = ', '.join('?' for _ in PROGRAM_COLUMNS)
+        cursor.executemany(f"INSERT INTO EmjmdPrograms ({', '.join(PROGRAM_COLUMNS)}) VALUES ({placeholders})", rows)
+
+    def upsert_programs(self, cursor, rows):
+        """Inserts new programs and updates existing ones in place (parsed requirements are kept)."""
+        raise NotImplementedError
+
+    def server_version(self) -> str:
+        raise NotImplementedError
+
+
+class SqlServerRepository(ProgramRepository):
+    dialect = 'mssql'
+
+    REQUIREMENTS_DDL = """
+    CREATE TABLE ProgramRequirements (
+        requirement_id INT PRIMARY KEY IDENTITY(1,1),
+        program_id INT NOT NULL,
+        min_toefl_score INT,
+        min_ielts_score DECIMAL(3,1),
+        min_cambridge_score NVARCHAR(10),
+        min_cgpa DECIMAL(3,2),
+        cgpa_scale DECIMAL(3,1),
+        english_required BIT,
+        work_experience_years INT,
+        accepted_degree_fields NVARCHAR(MAX),
+        requirement_text_raw NVARCHAR(MAX),
+        parsing_confidence DECIMAL(3,2),
+        extraction_tiers NVARCHAR(MAX),
+        content_hash CHAR(64),
+        created_at DATETIME DEFAULT GETDATE(),
+        FOREIGN KEY (program_id) REFERENCES EmjmdPrograms(program_id)
+    );
+    """
+
+    def __init__(self, connection_string: str = None, pool_size: int = 4):
+        self.connection_string = connection_string or os.environ.get('SMARTSCHOLAR_MSSQL', DEFAULT_MSSQL)
+        super().__init__(pool_size)
+
+    def connect(self):
+        import pyodbc
+        return pyodbc.connect(self.connection_string)
+
+    def catalog_version(self) -> str:
+        try:
+            return super().catalog_version()
+        except Exception:
+            # Databases created before CatalogMeta existed: fall back to table checksums
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT (SELECT CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM EmjmdPrograms), "
+                    "(SELECT CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM ProgramRequirements)"
+                )
+                row = cursor.fetchone()
+                cursor.close()
+                return f"checksum:{row[0]}:{row[1]}"
+
+    def bump_catalog_version(self, cursor):
+        cursor.execute("""
+        IF OBJECT_ID('dbo.CatalogMeta', 'U') IS NULL
+            CREATE TABLE CatalogMeta (meta_key NVARCHAR(100) PRIMARY KEY, meta_value NVARCHAR(200));
+        """)
+        cursor.execute("""
+        UPDATE CatalogMeta SET meta_value = CAST(CAST(meta_value AS INT) + 1 AS NVARCHAR(200))
+        WHERE meta_key = 'catalog_version';
+        IF @@ROWCOUNT = 0 INSERT INTO CatalogMeta (meta_key, meta_value) VALUES ('catalog_version', '1');
+        """)
+
+    def recreate_requirements_table(self, cursor):
+        cursor.execute("IF OBJECT_ID('dbo.ProgramRequirements', 'U') IS NOT NULL DROP TABLE dbo.ProgramRequirements;")
+        cursor.execute(self.REQUIREMENTS_DDL)
+        cursor.execute("CREATE INDEX IX_ProgramRequirements_program_id ON ProgramRequirements (program_id)")
+
+    def insert_programs(self, cursor, rows):
+        # Sends each batch as one parameter array instead of a round trip per row
+        cursor.fast_executemany = True
+        super().insert_programs(cursor, rows)
+
+    def upsert_programs(self, cursor, rows):
+        cursor.fast_executemany = True
+        source = ', '.join(f"? AS {c}" for c in PROGRAM_COLUMNS)
+        updates = ', '.join(f"t.{c} = s.{c}" for c in PROGRAM_COLUMNS[1:])
+        cursor.executemany(
+            f"MERGE EmjmdPrograms AS t USING (SELECT {source}) AS s ON t.program_id = s.program_id "
+            f"WHEN MATCHED THEN UPDATE SET {updates} "
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(PROGRAM_COLUMNS)}) VALUES ({', '.join('s.' + c for c in PROGRAM_COLUMNS)});",
+            rows
+        )
+
+    def server_version(self) -> str:
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT @@version")
+            version = cursor.fetchone()[0]
+            cursor.close()
+            return version
+
+
+class SqliteRepository(ProgramRepository):
+    """Offline backend with the same schema, loadable from dataset_clean.csv (no SQL Server needed)."""
+
+    dialect = 'sqlite'
+
+    REQUIREMENTS_DDL = """
+    CREATE TABLE ProgramRequirements (
+        requirement_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        program_id INTEGER NOT NULL REFERENCES EmjmdPrograms(program_id),
+        min_toefl_score INTEGER,
+        min_ielts_score REAL,
+        min_cambridge_score TEXT,
+        min_cgpa REAL,
+        cgpa_scale REAL,
+        english_required INTEGER,
+        work_experience_years INTEGER,
+        accepted_degree_fields TEXT,
+        requirement_text_raw TEXT,
+        parsing_confidence REAL,
+        extraction_tiers TEXT,
+        content_hash TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+    REQUIREMENTS_INDEX = "CREATE INDEX IF NOT EXISTS IX_ProgramRequirements_program_id ON ProgramRequirements (program_id)"
+
+    def __init__(self, path: str = None, pool_size: int = 4):
+        self.path = path or os.path.join(ROOT_DIR, 'artifacts', 'smartscholar.db')
+        in_memory = self.path == ':memory:'
+        if in_memory:
+            # Pooled connections must share one database, so use a named shared-cache memory DB
+            self.path = f"file:smartscholar-{id(self)}?mode=memory&cache=shared"
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        super().__init__(pool_size)
+        # A shared-cache memory database only lives while at least one connection is open
+        self._keepalive = self.connect() if in_memory else None
+        self.ensure_schema()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, uri=self.path.startswith('file:'), check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def ensure_schema(self):
+        with self.connection() as conn:
+            columns = ', '.join(
+                f"{c} INTEGER PRIMARY KEY NOT NULL" if c == 'program_id' else f"{c} TEXT" for c in PROGRAM_COLUMNS
+            )
+            conn.execute(f"CREATE TABLE IF NOT EXISTS EmjmdPrograms ({columns})")
+            conn.execute(self.REQUIREMENTS_DDL.replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+            conn.execute(self.REQUIREMENTS_INDEX)
+            conn.execute("CREATE TABLE IF NOT EXISTS CatalogMeta (meta_key TEXT PRIMARY KEY, meta_value TEXT)")
+            conn.commit()
+
+    def bump_catalog_version(self, cursor):
+        cursor.execute(
+            "INSERT INTO CatalogMeta (meta_key, meta_value) VALUES ('catalog_version', '1') "
+            "ON CONFLICT(meta_key) DO UPDATE SET meta_value = CAST(CAST(meta_value AS INTEGER) + 1 AS TEXT)"
+        )
+
+    def recreate_requirements_table(self, cursor):
+        cursor.execute("DROP TABLE IF EXISTS ProgramRequirements")
+        cursor.execute(self.REQUIREMENTS_DDL)
+        cursor.execute(self.REQUIREMENTS_INDEX)
+
+    def upsert_programs(self, cursor, rows):
+        updates = ', '.join(f"{c} = excluded.{c}" for c in PROGRAM_COLUMNS[1:])
+        cursor.executemany(
+            f"INSERT INTO EmjmdPrograms ({', '.join(PROGRAM_COLUMNS)}) VALUES ({', '.join('?' for _ in PROGRAM_COLUMNS)}) "
+            f"ON CONFLICT(program_id) DO UPDATE SET {updates}",
+            rows
+        )
+
+    def server_version(self) -> str:
+        return f"SQLite {sqlite3.sqlite_version} ({self.path})"
+
+    def program_count(self) -> int:
+        with self.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM EmjmdPrograms").fetchone()[0]
+
+    def load_csv(self, csv_path: str, delimiter: str = '|') -> int:
+        """Replaces EmjmdPrograms with the rows of a cleaned dataset file (same layout as the BULK INSERT)."""
+        with open(csv_path, encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f, delimiter=delimiter, quotechar='"')
+            next(reader, None)
+            rows = [[(v if v != '' else None) for v in row[:len(PROGRAM_COLUMNS)]] for row in reader if row]
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self.delete_catalog(cursor)
+            self.insert_programs(cursor, rows)
+            self.bump_catalog_version(cursor)
+            conn.commit()
+            cursor.close()
+        return len(rows)
+
+
+_default_repository = None
+_default_lock = threading.Lock()
+
+
+def get_repository(seed: bool = True) -> ProgramRepository:
+    """Process-wide repository chosen by SMARTSCHOLAR_DB ('mssql' by default, or 'sqlite:<path>').
+
+    An empty SQLite database is seeded from SMARTSCHOLAR_DATASET (default: dataset_clean.csv)
+    unless seed is False (loaders that fill it themselves).
+    """
+    global _default_repository
+    with _default_lock:
+        if _default_repository is None:
+            target = os.environ.get('SMARTSCHOLAR_DB', 'mssql')
+            if target.startswith('sqlite:'):
+                repo = SqliteRepository(target[len('sqlite:'):] or None)
+                if seed and repo.program_count() == 0:
+                    repo.load_csv(os.environ.get('SMARTSCHOLAR_DATASET', os.path.join(ROOT_DIR, 'dataset_clean.csv')))
+                _default_repository = repo
+            else:
+                _default_repository = SqlServerRepository()
+        return _default_repository
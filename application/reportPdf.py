@@ -0,0 +1,116 @@
+from fpdf import FPDF
+from collections import OrderedDict
+import hashlib
+import json
+import re
+import threading
+import metrics
+
+# Only the first rows of the ranking are printed
+REPORT_ROWS = 15
+PROFILE_KEYS = ('field', 'cgpa', 'cgpa_scale', 'ielts', 'toefl', 'work_experience')
+CACHE_SIZE = 128
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def report_key(profile, results):
+    """Hash of exactly what the report prints, so unchanged reruns map to the same PDF."""
+    payload = [[profile.get(k) for k in PROFILE_KEYS],
+               [[r['program_name'], r['overall_match']] for r in results[:REPORT_ROWS]]]
+    return hashlib.sha256(json.dumps(payload, default=str).encode('utf-8')).hexdigest()
+
+
+def cached_pdf(profile, results):
+    """generate_pdf memoized by report_key (small process-wide LRU)."""
+    key = report_key(profile, results)
+    with _cache_lock:
+        pdf = _cache.get(key)
+        if pdf is not None:
+            _cache.move_to_end(key)
+    metrics.cache('pdf', pdf is not None)
+    if pdf is None:
+        pdf = generate_pdf(profile, results)
+        with _cache_lock:
+            _cache[key] = pdf
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return pdf
+
+
+@metrics.timed('generate_pdf')
+def generate_pdf(profile, results):
+    # Tightened margins to maximize vertical space
+    pdf = FPDF(unit='mm', format='A4')
+    pdf.set_margins(10, 5, 10) 
+    pdf.add_page()
+    
+    # --- HEADER SECTION (More compact) ---
+    pdf.set_fill_color(20, 40, 80)
+    pdf.rect(0, 0, 210, 30, 'F')
+    
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_y(8)
+    pdf.set_font("Arial", 'B', 20)
+    pdf.cell(0, 8, "ScholarAI Eligibility Report", ln=True, align='C')
+    pdf.set_font("Arial", '', 9)
+    pdf.cell(0, 5, "Official Erasmus Mundus Compatibility Assessment", ln=True, align='C')
+    
+    # --- CANDIDATE PROFILE SECTION ---
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_y(32)
+    pdf.set_font("Arial", 'B', 11)
+    pdf.cell(0, 7, "CANDIDATE PROFILE SUMMARY", ln=True)
+    pdf.set_draw_color(200, 200, 200)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(1)
+    
+    pdf.set_font("Arial", '', 9)
+    # Using 6mm height for rows to save space
+    pdf.cell(95, 6, f"Major Field: {profile['field']}")
+    pdf.cell(95, 6, f"CGPA: {profile['cgpa']} / {profile['cgpa_scale']}", ln=True)
+    pdf.cell(95, 6, f"English Score: {profile['ielts'] if profile['ielts'] > 0 else profile['toefl']}")
+    pdf.cell(95, 6, f"Work Experience: {profile['work_experience']} Years", ln=True)
+    
+    # --- MATCHING RESULTS TABLE ---
+    pdf.ln(2)
+    pdf.set_font("Arial", 'B', 11)
+    pdf.cell(0, 7, "PROGRAM COMPATIBILITY RANKING", ln=True)
+    
+    # Professional Header
+    pdf.set_font("Arial", 'B', 9)
+    pdf.set_fill_color(230, 235, 245)
+    pdf.cell(12, 9, "Rank", 1, 0, 'C', True)
+    pdf.cell(123, 9, " Program Name", 1, 0, 'L', True)
+    pdf.cell(25, 9, "Match Index", 1, 0, 'C', True)
+    pdf.cell(30, 9, "Standing", 1, 1, 'C', True)
+    
+    # ROW HEIGHT REDUCED TO 8.0mm TO ENSURE 1-PAGE FIT
+    pdf.set_font("Arial", '', 8)
+    for i, res in enumerate(results[:REPORT_ROWS], 1):
+        clean_name = re.sub(r'[^\x00-\x7F]+', '', res['program_name'])
+        name = (clean_name[:78] + '..') if len(clean_name) > 78 else clean_name
+        
+        pdf.cell(12, 8.0, str(i), 1, 0, 'C')
+        pdf.cell(123, 8.0, f" {name}", 1, 0, 'L')
+        
+        pdf.set_font("Arial", 'B', 8)
+        pdf.cell(25, 8.0, f"{res['overall_match']}%", 1, 0, 'C')
+        
+        if res['overall_match'] >= 80:
+            pdf.set_text_color(0, 100, 0)
+            status_text = "HIGHLY MATCHED"
+        elif res['overall_match'] >= 60:
+            pdf.set_text_color(180, 120, 0)
+            status_text = "QUALIFIED"
+        else:
+            pdf.set_text_color(150, 0, 0)
+            status_text = "LOW MATCH"
+            
+        pdf.cell(30, 8.0, status_text, 1, 1, 'C')
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font("Arial", '', 8)
+
+    
+    return pdf.output(dest='S').encode('latin-1', errors='replace')
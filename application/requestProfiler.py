@@ -0,0 +1,313 @@
+import argparse
+import functools
+import glob
+import itertools
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import embeddingStore
+import metrics
+
+PROFILE_ENV = 'SMARTSCHOLAR_PROFILE'
+SUFFIX = '.collapsed'
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.]+')
+
+
+def _rate(value: str) -> float:
+    """'1'/'on' profiles every request, a fraction in (0, 1) that share of them, anything else none."""
+    value = (value or '').strip().lower()
+    if value in ('on', 'true', 'yes', 'all'):
+        return 1.0
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+# Off unless SMARTSCHOLAR_PROFILE is set; unsampled requests cost one random() call
+RATE = _rate(os.environ.get(PROFILE_ENV))
+INTERVAL = float(os.environ.get('SMARTSCHOLAR_PROFILE_INTERVAL_MS', '2')) / 1000
+MIN_MS = float(os.environ.get('SMARTSCHOLAR_PROFILE_MIN_MS', '0'))
+PROFILE_DIR = os.environ.get('SMARTSCHOLAR_PROFILE_DIR') or os.path.join(embeddingStore.ARTIFACT_DIR, 'profiles')
+MAX_BYTES = int(float(os.environ.get('SMARTSCHOLAR_PROFILE_MAX_MB', '50')) * 2 ** 20)
+MAX_FILES = int(os.environ.get('SMARTSCHOLAR_PROFILE_MAX_FILES', '500'))
+
+
+def _safe(value) -> str:
+    return _UNSAFE.sub('_', str(value))
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame, stop) -> str:
+    """Root-first 'caller;callee;...' for a thread's current frame, cut above `stop` (excluded)."""
+    names = []
+    while frame is not None and frame is not stop:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class _Sampler(threading.Thread):
+    """One background thread sampling the stacks of every thread a live capture is watching."""
+
+    def __init__(self):
+        super().__init__(name='request-profiler', daemon=True)
+        self._lock = threading.Lock()
+        self._watched = {}  # thread id -> [(capture, stop frame)]
+        self._wake = threading.Event()
+
+    def add(self, thread_id: int, capture, stop):
+        with self._lock:
+            self._watched.setdefault(thread_id, []).append((capture, stop))
+        self._wake.set()
+
+    def remove(self, thread_id: int, capture):
+        with self._lock:
+            entries = [e for e in self._watched.get(thread_id, []) if e[0] is not capture]
+            if entries:
+                self._watched[thread_id] = entries
+            else:
+                self._watched.pop(thread_id, None)
+
+    def run(self):
+        while True:
+            if not self._watched:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            time.sleep(INTERVAL)
+            frames = sys._current_frames()
+            with self._lock:
+                watched = [(tid, list(entries)) for tid, entries in self._watched.items()]
+            for tid, entries in watched:
+                frame = frames.get(tid)
+                if frame is not None:
+                    for capture, stop in entries:
+                        capture._add(_collapse(frame, stop))
+            del frames
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+_rotate_lock = threading.Lock()
+_sequence = itertools.count()
+# Profiles are written and rotated here, off the request path being measured (flushed at exit)
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profile-writer')
+
+
+def _get_sampler() -> _Sampler:
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = _Sampler()
+            _sampler.start()
+        return _sampler
+
+
+class Capture:
+    """Stack samples of one request, written as a collapsed-stack file when closed.
+
+    `with capture:` samples the current thread below the calling function; watch(fn) samples
+    whichever thread runs fn (e.g. executor workers), in which case call close() when done.
+    """
+
+    def __init__(self, label: str, **tags):
+        self.label = label
+        self.tags = dict(tags)
+        self.stacks = Counter()
+        self.path = None
+        self._started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _add(self, stack: str):
+        with self._lock:
+            self.stacks[stack] += 1
+
+    def tag(self, **tags):
+        self.tags.update(tags)
+
+    def watch(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            thread_id = threading.get_ident()
+            _get_sampler().add(thread_id, self, sys._getframe())
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _get_sampler().remove(thread_id, self)
+        return wrapper
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        _get_sampler().add(self._thread_id, self, sys._getframe(1).f_back)
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        _get_sampler().remove(self._thread_id, self)
+        if exc_type is not None:
+            self.tag(error=exc_type.__name__)
+        self.close()
+        return False
+
+    def close(self, **tags):
+        """Queues the profile for writing (unless it has no samples or ran under SMARTSCHOLAR_PROFILE_MIN_MS).
+
+        Returns the path it will be written to; flush() waits for pending writes.
+        """
+        self.tag(**tags)
+        with self._lock:
+            if self._closed:
+                return self.path
+            self._closed = True
+            stacks = dict(self.stacks)
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        if not stacks or elapsed_ms < MIN_MS:
+            return None
+        tags = sorted(self.tags.items()) + [('ms', f"{elapsed_ms:.0f}"), ('pid', os.getpid())]
+        parts = [self._started_at.strftime('%Y%m%dT%H%M%S%f'), _safe(self.label)]
+        parts += [f"{_safe(k)}={_safe(v)}" for k, v in tags] + [str(next(_sequence))]
+        name = '-'.join(parts) + SUFFIX
+        self.path = os.path.join(PROFILE_DIR, name)
+        _writer.submit(_write, self.path, stacks, self.label)
+        return self.path
+
+
+def _write(path: str, stacks: dict, label: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+    metrics.inc('profiles_written', label=label)
+    rotate(os.path.dirname(path))
+
+
+def flush():
+    """Waits until every closed profile has been written and rotated."""
+    _writer.submit(lambda: None).result()
+
+
+class _NullCapture:
+    __slots__ = ()
+    path = None
+
+    def tag(self, **tags):
+        pass
+
+    def watch(self, fn):
+        return fn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self, **tags):
+        return None
+
+
+_NULL_CAPTURE = _NullCapture()
+
+
+def request(label: str, **tags):
+    """A Capture for this request when it is sampled (SMARTSCHOLAR_PROFILE), otherwise a no-op stand-in."""
+    if RATE and (RATE >= 1.0 or random.random() < RATE):
+        return Capture(label, **tags)
+    return _NULL_CAPTURE
+
+
+def configure(rate: float = None, directory: str = None, min_ms: float = None):
+    global RATE, PROFILE_DIR, MIN_MS
+    if rate is not None:
+        RATE = rate
+    if directory is not None:
+        PROFILE_DIR = directory
+    if min_ms is not None:
+        MIN_MS = min_ms
+
+
+def profile_files(directory: str = None) -> list:
+    """Profile files oldest first (names start with their timestamp)."""
+    return sorted(glob.glob(os.path.join(directory or PROFILE_DIR, f"*{SUFFIX}")), key=os.path.basename)
+
+
+def rotate(directory: str = None, max_bytes: int = None, max_files: int = None) -> int:
+    """Deletes the oldest profiles until the directory is within both limits; returns how many were removed."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    max_files = MAX_FILES if max_files is None else max_files
+    with _rotate_lock:
+        files = []
+        for path in profile_files(directory):
+            try:
+                files.append((path, os.path.getsize(path)))
+            except OSError:
+                pass  # removed by another process
+        total, removed = sum(size for _, size in files), 0
+        for path, size in files:
+            if total <= max_bytes and len(files) - removed <= max_files:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+def parse_name(path: str) -> dict:
+    """Label and tags encoded in a profile's file name."""
+    parts = os.path.basename(path)[:-len(SUFFIX)].split('-')
+    info = {'started_at': parts[0], 'label': parts[1]}
+    info.update(p.split('=', 1) for p in parts[2:] if '=' in p)
+    return info
+
+
+def merge(paths) -> Counter:
+    stacks = Counter()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack:
+                    stacks[stack] += int(count)
+    return stacks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge captured request profiles into one collapsed-stack file "
+                                                 "(flamegraph.pl, speedscope, inferno).")
+    parser.add_argument('--dir', default=PROFILE_DIR)
+    parser.add_argument('--label', help="Only profiles of this request kind (e.g. service_rank, streamlit_submit)")
+    parser.add_argument('--min-ms', type=float, default=0.0, help="Only requests at least this slow")
+    parser.add_argument('--output', default='merged.collapsed')
+    args = parser.parse_args(argv)
+
+    selected = []
+    for path in profile_files(args.dir):
+        info = parse_name(path)
+        if (args.label is None or info['label'] == args.label) and float(info.get('ms', 0)) >= args.min_ms:
+            selected.append(path)
+    if not selected:
+        raise SystemExit(f"❌ No matching profiles in {args.dir}")
+    stacks = merge(selected)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    print(f"✅ {len(selected)} profiles, {sum(stacks.values())} samples -> {args.output}")
+    print(f"   Render with: flamegraph.pl {args.output} > flame.svg (or open it in speedscope.app)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import re
+
+# Same keyword table as nlpParser.parse_accepted_fields_spacy
+FIELD_KEYWORDS = {
+    'Computer Science': ['computer science', 'cs', 'computing', 'software'],
+    'Engineering': ['engineering', 'mechanical', 'electrical', 'civil', 'chemical'],
+    'Mathematics': ['mathematics', 'math', 'mathematical', 'maths'],
+    'Physics': ['physics', 'physical'],
+    'Chemistry': ['chemistry', 'chemical'],
+    'Biology': ['biology', 'biological', 'life science'],
+    'Medicine': ['medicine', 'medical', 'health'],
+    'Business': ['business', 'commerce', 'management'],
+    'Economics': ['economics', 'economic'],
+    'Law': ['law', 'legal'],
+    'Psychology': ['psychology'],
+    'Statistics': ['statistics', 'statistical'],
+    'Data Science': ['data science', 'data analytics'],
+    'IT': ['it', 'information technology'],
+    'Architecture': ['architecture'],
+    'Environmental Science': ['environmental', 'sustainability'],
+    'Humanities': ['humanities', 'language', 'literature', 'history'],
+}
+
+# Fields whose producing tier is recorded; only min_cgpa and work_experience_years read spaCy entities
+TIERED_FIELDS = ['min_toefl_score', 'min_ielts_score', 'min_cambridge_score', 'min_cgpa', 'cgpa_scale',
+                 'english_required', 'work_experience_years', 'accepted_degree_fields']
+
+ENGLISH_KEYWORDS = ['english', 'toefl', 'ielts', 'cambridge', 'proficiency', 'language test']
+
+# keyword -> every field it implies ('chemical' counts for Engineering and Chemistry)
+KEYWORD_FIELDS = {}
+for _field, _keywords in FIELD_KEYWORDS.items():
+    for _kw in _keywords:
+        KEYWORD_FIELDS.setdefault(_kw, set()).add(_field)
+
+
+def _trie_pattern(words):
+    """Regex alternation factored by common prefixes, so a failing position costs one char test."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy optional tail: the longest key at a position wins ('mathematics' over 'math')
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+SCALE_KEYS = {'/5': 5.0, 'out of 5': 5.0, 'scale of 5': 5.0, '/10': 10.0, 'out of 10': 10.0, 'scale of 10': 10.0}
+ANCHOR_KEYS = (set(KEYWORD_FIELDS) | set(ENGLISH_KEYWORDS) | set(SCALE_KEYS) |
+               {'gpa', 'cgpa', 'grade point', 'grade point average', 'c1', 'c2', 'minimum', 'year', 'experience'})
+
+# The one scan: every keyword, test name and number start in the lowercased text. The lookahead
+# keeps it zero-width so overlapping hits (e.g. 'cs' inside 'physics') are all reported, exactly
+# like the substring checks it replaces.
+ANCHOR_PATTERN = re.compile(r'(?=(' + _trie_pattern(ANCHOR_KEYS) + r'|\d))')
+
+# Anchored detail patterns, only tried at the anchor positions found above
+TOEFL_DETAIL = re.compile(r'toefl\s+(?:ibt)?\s*(?:≥|>=|minimum\s+)?(\d{2,3})')
+IELTS_DETAIL = re.compile(r'ielts\s+(?:academic)?\s*(?:≥|>=)?(\d\.\d)')
+CGPA_DETAIL = re.compile(r'(?:gpa|cgpa|grade point average)\s*(?:of\s+)?(?:≥|>=|minimum\s+)?(\d\.\d+)')
+WORK_DETAIL = re.compile(r'(?:minimum\s+)?(\d+)\+?\s+years?\s+(?:of\s+)?(?:work\s+)?experience')
+CAMBRIDGE_DETAIL = re.compile(r'\bC[12]\b')
+
+
+def _lower_same_length(text):
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    # A few characters expand when lowercased (e.g. 'İ'); keep offsets aligned with the original
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+def _cardinals(doc):
+    return [ent.text for ent in doc.ents if ent.label_ == "CARDINAL"] if doc is not None else []
+
+
+def extract_requirements(program_id, requirement_text, doc=None):
+    """Extract every requirement field in one scan of the text (plus anchored matches at the hits).
+
+    Returns the same dict as nlpParser.parse_requirement_row_spacy. CGPA and work experience
+    still prefer spaCy CARDINAL entities when a doc is given; without one they use the regex
+    fallback directly.
+    """
+    extracted = extract_with_sources(program_id, requirement_text, doc)
+    return extracted[0] if extracted else None
+
+
+def extract_with_sources(program_id, requirement_text, doc=None):
+    """extract_requirements plus per-field detail: (result, {field: confidence}, {field: 'regex' | 'ner'},
+    fields whose context is in the text, so NER could still fill or improve them)."""
+    if not requirement_text:
+        return None
+
+    # Case-sensitive checks (TOEFL/IELTS/GPA context, C1/C2) read the original text at the same offset
+    low = _lower_same_length(requirement_text)
+    toefl_m = ielts_m = cgpa_m = work_m = cambridge = None
+    toefl_ctx = ielts_ctx = gpa_ctx = english = year = experience = False
+    fields, scales = set(), set()
+
+    for m in ANCHOR_PATTERN.finditer(low):
+        key, pos = m.group(1), m.start()
+        field_hits = KEYWORD_FIELDS.get(key)
+        if field_hits:
+            fields.update(field_hits)
+        elif key == 'toefl':
+            english = True
+            toefl_ctx = toefl_ctx or requirement_text.startswith('TOEFL', pos)
+            toefl_m = toefl_m or TOEFL_DETAIL.match(low, pos)
+        elif key == 'ielts':
+            english = True
+            ielts_ctx = ielts_ctx or requirement_text.startswith('IELTS', pos)
+            ielts_m = ielts_m or IELTS_DETAIL.match(low, pos)
+        elif key in ('gpa', 'cgpa', 'grade point average', 'grade point'):
+            gpa_ctx = gpa_ctx or key.startswith('grade') or requirement_text.startswith('GPA', pos)
+            if key != 'grade point':
+                cgpa_m = cgpa_m or CGPA_DETAIL.match(low, pos)
+        elif key == 'minimum' or key[0].isdigit():
+            work_m = work_m or WORK_DETAIL.match(low, pos)
+        elif key in ('c1', 'c2'):
+            if cambridge is None and CAMBRIDGE_DETAIL.match(requirement_text, pos):
+                cambridge = requirement_text[pos:pos + 2]
+        elif key in SCALE_KEYS:
+            scales.add(SCALE_KEYS[key])
+        elif key == 'year':
+            year = True
+        elif key == 'experience':
+            experience = True
+        else:
+            english = True
+            if key == 'language test':
+                fields.add('Humanities')
+
+    min_toefl, toefl_conf = None, 0.0
+    if toefl_ctx and toefl_m:
+        score = int(toefl_m.group(1))
+        if 50 <= score <= 120:
+            min_toefl, toefl_conf = score, 0.95
+
+    min_ielts, ielts_conf = None, 0.0
+    if ielts_ctx and ielts_m:
+        score = float(ielts_m.group(1))
+        if 0.0 <= score <= 9.0:
+            min_ielts, ielts_conf = score, 0.95
+
+    cardinals = _cardinals(doc) if (gpa_ctx or (year and experience)) else []
+
+    sources = {}
+    min_cgpa, cgpa_conf = None, 0.0
+    if gpa_ctx:
+        for ent_text in cardinals:
+            try:
+                val = float(ent_text)
+                if 0.0 <= val <= 5.0 and (min_cgpa is None or val > min_cgpa):
+                    min_cgpa, cgpa_conf = val, 0.90
+                    sources['min_cgpa'] = 'ner'
+            except ValueError:
+                pass
+        if min_cgpa is None and cgpa_m:
+            min_cgpa, cgpa_conf = float(cgpa_m.group(1)), 0.85
+
+    work_exp, work_exp_conf = None, 0.0
+    if year and experience:
+        for ent_text in cardinals:
+            try:
+                val = int(float(ent_text))
+                if 0 < val <= 50:
+                    work_exp, work_exp_conf = val, 0.90
+                    sources['work_experience_years'] = 'ner'
+            except ValueError:
+                pass
+        if work_exp is None and work_m:
+            work_exp, work_exp_conf = int(work_m.group(1)), 0.85
+
+    confidences = [c for c in [toefl_conf, ielts_conf, cgpa_conf, work_exp_conf] if c > 0]
+    avg_confidence = sum(confidences) / len(confidences) if confidences else 0.70
+
+    result = {
+        'program_id': program_id,
+        'min_toefl_score': min_toefl,
+        'min_ielts_score': min_ielts,
+        'min_cambridge_score': cambridge,
+        'min_cgpa': min_cgpa,
+        'cgpa_scale': 5.0 if 5.0 in scales else 10.0 if 10.0 in scales else 4.0,
+        'english_required': 1 if english else 0,
+        'work_experience_years': work_exp,
+        'accepted_degree_fields': ', '.join(sorted(fields)) if fields else None,
+        'requirement_text_raw': requirement_text,
+        'parsing_confidence': round(avg_confidence, 2)
+    }
+    field_confidences = {'min_toefl_score': toefl_conf, 'min_ielts_score': ielts_conf,
+                         'min_cgpa': cgpa_conf, 'work_experience_years': work_exp_conf}
+    for name in TIERED_FIELDS:
+        if result[name] is not None:
+            sources.setdefault(name, 'regex')
+    ner_context = {name for name, present in (('min_cgpa', gpa_ctx), ('work_experience_years', year and experience)) if present}
+    return result, field_confidences, sources, ner_context
+
+
+def parsing_confidence(field_confidences):
+    """Average of the non-zero per-field confidences (0.70 when nothing was found), as in extract_requirements."""
+    confidences = [c for c in field_confidences.values() if c > 0]
+    return round(sum(confidences) / len(confidences) if confidences else 0.70, 2)
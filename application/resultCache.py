@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import metrics
+
+DEFAULT_SIZE = int(os.environ.get('SMARTSCHOLAR_RESULT_CACHE_SIZE', '1024'))
+DEFAULT_TTL = float(os.environ.get('SMARTSCHOLAR_RESULT_CACHE_TTL', '3600'))
+
+
+class ResultCache:
+    """Thread-safe LRU with a per-entry time-to-live, shared by every session in the process."""
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE, ttl: float = DEFAULT_TTL, name: str = 'results'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: Hashable):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.cache(self.name, entry is not None)
+        return None if entry is None else entry[1]
+
+    def put(self, key: Hashable, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable):
+        value = self.get(key)
+        if value is None:
+            # Computed outside the lock; concurrent misses on one key just compute it twice
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl, 'hits': self.hits,
+                'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions, 'expirations': self.expirations,
+            }
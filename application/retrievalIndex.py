@@ -0,0 +1,148 @@
+import numpy as np
+
+# Average programs per inverted list; partitions smaller than two lists are searched exhaustively
+DEFAULT_LIST_SIZE = 256
+DEFAULT_NPROBE = 16
+
+
+def _sorted_column(values: np.ndarray):
+    """Row ids with a known value, ordered by that value, plus the sorted values (NaN rows left out)."""
+    rows = np.flatnonzero(~np.isnan(values))
+    order = rows[np.argsort(values[rows], kind='stable')]
+    return order, values[order]
+
+
+class IvfPartition:
+    """Inverted-file index over one domain's programs: spherical k-means lists, probed by centroid similarity."""
+
+    def __init__(self, matrix: np.ndarray, rows: np.ndarray, list_size: int = DEFAULT_LIST_SIZE,
+                 n_iter: int = 8, seed: int = 0, chunk: int = 8192):
+        self.rows = rows
+        n_lists = len(rows) // list_size
+        if n_lists < 2:
+            self.centroids, self.members, self.offsets = None, rows, np.array([0, len(rows)])
+            return
+
+        rng = np.random.default_rng(seed)
+        sample_rows = rows if len(rows) <= 64 * n_lists else rng.choice(rows, 64 * n_lists, replace=False)
+        sample = np.asarray(matrix[np.sort(sample_rows)], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind='stable')
+            counts = np.bincount(assign, minlength=n_lists)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+            # Empty lists keep their previous centroid
+            centroids[filled] = np.add.reduceat(sample[order], starts, axis=0)
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.centroids = centroids
+
+        assign = np.concatenate([
+            np.argmax(np.asarray(matrix[rows[i:i + chunk]], dtype=np.float32) @ centroids.T, axis=1)
+            for i in range(0, len(rows), chunk)
+        ])
+        order = np.argsort(assign, kind='stable')
+        self.members = rows[order]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=n_lists))))
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.offsets) - 1
+
+    def expected_candidates(self, nprobe: int) -> int:
+        return len(self.rows) * min(nprobe, self.n_lists) // self.n_lists
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        if self.centroids is None or nprobe >= self.n_lists:
+            return self.members
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.members[self.offsets[l]:self.offsets[l + 1]] for l in lists])
+
+
+class ProgramIndex:
+    """Candidate retrieval for one catalog: hard requirement filters, then approximate nearest neighbours.
+
+    Minimum CGPA (as a fraction of its scale), IELTS and TOEFL minimums are kept as sorted columns,
+    so the number of programs a student qualifies for is a binary search. When that set is smaller
+    than what an IVF probe would touch, it is scanned exactly; otherwise the student's domain
+    partition is probed and the requirement checks run only on the probed rows.
+    """
+
+    def __init__(self, embeddings: np.ndarray, domains: np.ndarray, min_cgpa: np.ndarray, cgpa_scale: np.ndarray,
+                 min_ielts: np.ndarray, min_toefl: np.ndarray, list_size: int = DEFAULT_LIST_SIZE, seed: int = 0):
+        self.embeddings = embeddings
+        self.domains = np.asarray(domains, dtype=object)
+        # Same defaults as the scorer: no minimum CGPA = 0, unknown scale = 4.0
+        self.min_cgpa = np.nan_to_num(min_cgpa, nan=0.0)
+        self.cgpa_scale = np.nan_to_num(cgpa_scale, nan=4.0)
+        self.min_ielts, self.min_toefl = min_ielts, min_toefl
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            required_fraction = np.where(self.cgpa_scale > 0, self.min_cgpa / self.cgpa_scale, 0.0)
+        self.cgpa_order = np.argsort(required_fraction, kind='stable')
+        self.cgpa_sorted = required_fraction[self.cgpa_order]
+        self.ielts_order, self.ielts_sorted = _sorted_column(min_ielts)
+        self.toefl_order, self.toefl_sorted = _sorted_column(min_toefl)
+        self.no_language_rows = np.flatnonzero(np.isnan(min_ielts) & np.isnan(min_toefl))
+
+        self.partitions = {
+            domain: IvfPartition(embeddings, np.flatnonzero(self.domains == domain), list_size, seed=seed)
+            for domain in dict.fromkeys(self.domains)
+        }
+
+    def __len__(self) -> int:
+        return len(self.domains)
+
+    def _eligible(self, rows: np.ndarray, profile: dict) -> np.ndarray:
+        """Exact requirement check on a few rows (same comparisons as the scorer)."""
+        norm_student = (profile['cgpa'] / profile['cgpa_scale']) * self.cgpa_scale[rows]
+        ok = norm_student >= self.min_cgpa[rows]
+        ielts, toefl = profile.get('ielts') or 0, profile.get('toefl') or 0
+        min_ielts, min_toefl = self.min_ielts[rows], self.min_toefl[rows]
+        with np.errstate(invalid='ignore'):
+            language = (np.isnan(min_ielts) & np.isnan(min_toefl)) | \
+                       ((ielts > 0) & (ielts >= min_ielts)) | ((toefl > 0) & (toefl >= min_toefl))
+        return ok & language
+
+    def _filtered_rows(self, profile: dict):
+        """Smallest superset of the eligible rows that the sorted columns give directly, with its size."""
+        fraction = profile['cgpa'] / profile['cgpa_scale']
+        # Small epsilon: the division differs from the scorer's multiplication in the last bit; _eligible re-checks
+        n_cgpa = int(np.searchsorted(self.cgpa_sorted, fraction + 1e-9, side='right'))
+        ielts, toefl = profile.get('ielts') or 0, profile.get('toefl') or 0
+        n_ielts = int(np.searchsorted(self.ielts_sorted, ielts, side='right')) if ielts > 0 else 0
+        n_toefl = int(np.searchsorted(self.toefl_sorted, toefl, side='right')) if toefl > 0 else 0
+        n_language = len(self.no_language_rows) + n_ielts + n_toefl
+        if n_cgpa <= n_language:
+            return n_cgpa, lambda: self.cgpa_order[:n_cgpa]
+        return n_language, lambda: np.unique(np.concatenate(
+            (self.no_language_rows, self.ielts_order[:n_ielts], self.toefl_order[:n_toefl])))
+
+    def search(self, query: np.ndarray, domain: str, profile: dict, nprobe: int = DEFAULT_NPROBE,
+               min_similarity: float = 0.28, hard_filters: bool = True):
+        """Row ids (and similarities) of same-domain programs with similarity >= min_similarity.
+
+        With hard_filters, only programs whose CGPA and IELTS/TOEFL minimums the student meets
+        (or that state no English test minimum) are returned.
+        """
+        partition = self.partitions.get(domain)
+        if partition is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        rows = None
+        if hard_filters:
+            n_filtered, filtered_rows = self._filtered_rows(profile)
+            if n_filtered <= partition.expected_candidates(nprobe):
+                rows = filtered_rows()
+                rows = rows[self.domains[rows] == domain]
+        if rows is None:
+            rows = partition.probe(query, nprobe)
+        if hard_filters:
+            rows = rows[self._eligible(rows, profile)]
+        # Catalog order, so ties rank the same as in a full scan
+        rows = np.sort(rows)
+
+        similarity = np.asarray(self.embeddings[rows], dtype=np.float32) @ query
+        keep = similarity >= min_similarity
+        return rows[keep], similarity[keep]
@@ -1,90 +1,22 @@
 import streamlit as st
 import pandas as pd
-from MatchingAlgo import MatchingAlgorithm
-from fpdf import FPDF
-import io
-import re
-
-def generate_pdf(profile, results):
-    # Tightened margins to maximize vertical space
-    pdf = FPDF(unit='mm', format='A4')
-    pdf.set_margins(10, 5, 10) 
-    pdf.add_page()
-    
-    # --- HEADER SECTION (More compact) ---
-    pdf.set_fill_color(20, 40, 80)
-    pdf.rect(0, 0, 210, 30, 'F')
-    
-    pdf.set_text_color(255, 255, 255)
-    pdf.set_y(8)
-    pdf.set_font("Arial", 'B', 20)
-    pdf.cell(0, 8, "ScholarAI Eligibility Report", ln=True, align='C')
-    pdf.set_font("Arial", '', 9)
-    pdf.cell(0, 5, "Official Erasmus Mundus Compatibility Assessment", ln=True, align='C')
-    
-    # --- CANDIDATE PROFILE SECTION ---
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_y(32)
-    pdf.set_font("Arial", 'B', 11)
-    pdf.cell(0, 7, "CANDIDATE PROFILE SUMMARY", ln=True)
-    pdf.set_draw_color(200, 200, 200)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(1)
-    
-    pdf.set_font("Arial", '', 9)
-    # Using 6mm height for rows to save space
-    pdf.cell(95, 6, f"Major Field: {profile['field']}")
-    pdf.cell(95, 6, f"CGPA: {profile['cgpa']} / {profile['cgpa_scale']}", ln=True)
-    pdf.cell(95, 6, f"English Score: {profile['ielts'] if profile['ielts'] > 0 else profile['toefl']}")
-    pdf.cell(95, 6, f"Work Experience: {profile['work_experience']} Years", ln=True)
-    
-    # --- MATCHING RESULTS TABLE ---
-    pdf.ln(2)
-    pdf.set_font("Arial", 'B', 11)
-    pdf.cell(0, 7, "PROGRAM COMPATIBILITY RANKING", ln=True)
-    
-    # Professional Header
-    pdf.set_font("Arial", 'B', 9)
-    pdf.set_fill_color(230, 235, 245)
-    pdf.cell(12, 9, "Rank", 1, 0, 'C', True)
-    pdf.cell(123, 9, " Program Name", 1, 0, 'L', True)
-    pdf.cell(25, 9, "Match Index", 1, 0, 'C', True)
-    pdf.cell(30, 9, "Standing", 1, 1, 'C', True)
-    
-    # ROW HEIGHT REDUCED TO 8.0mm TO ENSURE 1-PAGE FIT
-    pdf.set_font("Arial", '', 8)
-    for i, res in enumerate(results[:15], 1):
-        clean_name = re.sub(r'[^\x00-\x7F]+', '', res['program_name'])
-        name = (clean_name[:78] + '..') if len(clean_name) > 78 else clean_name
-        
-        pdf.cell(12, 8.0, str(i), 1, 0, 'C')
-        pdf.cell(123, 8.0, f" {name}", 1, 0, 'L')
-        
-        pdf.set_font("Arial", 'B', 8)
-        pdf.cell(25, 8.0, f"{res['overall_match']}%", 1, 0, 'C')
-        
-        if res['overall_match'] >= 80:
-            pdf.set_text_color(0, 100, 0)
-            status_text = "HIGHLY MATCHED"
-        elif res['overall_match'] >= 60:
-            pdf.set_text_color(180, 120, 0)
-            status_text = "QUALIFIED"
-        else:
-            pdf.set_text_color(150, 0, 0)
-            status_text = "LOW MATCH"
-            
-        pdf.cell(30, 8.0, status_text, 1, 1, 'C')
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font("Arial", '', 8)
-
-    
-    return pdf.output(dest='S').encode('latin-1', errors='replace')
+from MatchingAlgo import get_shared_matcher
+from reportPdf import cached_pdf, report_key
+import metrics
+import requestProfiler
 
 st.set_page_config(page_title="ScholarAI", layout="wide")
 st.title("🎓 ScholarAI - Erasmus Mundus Matcher")
 
-if 'session_matcher' not in st.session_state:
-    st.session_state.session_matcher = MatchingAlgorithm()
+@st.cache_resource(show_spinner="Loading matching model and program catalog...")
+def load_matcher():
+    # One model + catalog per server process, shared by every browser session
+    matcher = get_shared_matcher()
+    report = ", ".join(f"{phase}={secs:.2f}s" for phase, secs in matcher.init_timings.items())
+    print(f"ScholarAI startup: {report}")
+    return matcher
+
+matcher = load_matcher()
 
 with st.sidebar:
     st.header("📋 Your Profile")
@@ -98,13 +30,29 @@ with st.sidebar:
         ielts = c2.number_input("IELTS", 0.0, 9.0, 0.0)
         work_exp = st.number_input("Years of Experience", 0, 20, 0)
         submit = st.form_submit_button("🔍 Find Programs", type="primary", use_container_width=True)
+    with st.expander("⏱ Startup report"):
+        for phase, secs in matcher.init_timings.items():
+            st.caption(f"{phase}: {secs:.2f}s")
+        cache = matcher.result_cache.stats()
+        st.caption(f"result cache: {cache['hits']}/{cache['hits'] + cache['misses']} hits ({cache['hit_rate']:.0%}), {cache['size']} entries")
+        # Expander bodies run on every rerun, so the stored-entry COUNT(*) is only taken with metrics on
+        texts = matcher.text_cache.stats(include_disk=metrics.ENABLED)
+        stored = f", {texts['disk_entries']} stored" if metrics.ENABLED else ""
+        st.caption(f"embedding cache: {texts['hit_rate']:.0%} hits ({texts['memory_hits']} memory, {texts['disk_hits']} disk)"
+                   f"{stored}")
+    if metrics.ENABLED:
+        with st.expander("📈 Metrics"):
+            st.json(metrics.snapshot())
 
 if submit and field:
     profile = {'cgpa': cgpa, 'cgpa_scale': cgpa_scale, 'field': field, 'ielts': ielts, 'toefl': toefl, 'work_experience': work_exp}
     st.session_state.current_profile = profile
-    df = st.session_state.session_matcher.get_all_programs()
-    st.session_state.results = sorted([st.session_state.session_matcher.calculate_total_match(profile, row) for _, row in df.iterrows()], 
-                                     key=lambda x: x['overall_match'], reverse=True)
+    with metrics.timer('streamlit_submit'), requestProfiler.request('streamlit_submit') as capture:
+        st.session_state.results = matcher.rank_programs_cached(profile).to_dict('records')
+        capture.tag(programs=len(st.session_state.results), catalog_version=matcher.catalog_version)
+    # Exported only after work was recorded, not on every widget rerun
+    if metrics.ENABLED:
+        metrics.write()
 
 if 'results' in st.session_state:
     p = st.session_state.current_profile
@@ -134,7 +82,32 @@ if 'results' in st.session_state:
     st.subheader("📋 Ranked Match Results")
     res_df = pd.DataFrame(st.session_state.results)
     st.dataframe(res_df[['status', 'program_name', 'overall_match', 'field_score', 'cgpa_score']], use_container_width=True, hide_index=True)
+
+    # Keys the on-request what-if table and PDF: reruns reuse them until the profile or results change
+    report = report_key(st.session_state.current_profile, st.session_state.results)
+
+    with st.expander("🎯 What would it take to reach 80%?"):
+        if st.session_state.get('what_if_key') != report:
+            if st.button("🔎 Find the gaps", use_container_width=True):
+                # One change at a time; NaN means that change alone is not enough
+                gaps = matcher.what_if(st.session_state.current_profile)
+                st.session_state.what_if = gaps[(gaps['overall_match'] > 0) & (gaps['overall_match'] < 80)].head(10)
+                st.session_state.what_if_key = report
+                if metrics.ENABLED:
+                    metrics.write()
+        if st.session_state.get('what_if_key') == report:
+            st.dataframe(st.session_state.what_if[['program_name', 'overall_match', 'cgpa_for_80', 'ielts_for_80', 'toefl_for_80',
+                                                   'work_experience_for_80']], use_container_width=True, hide_index=True)
     
     st.subheader("📂 Export Report")
-    pdf_bytes = generate_pdf(st.session_state.current_profile, st.session_state.results)
-    st.download_button("📄 Download PDF Report", data=pdf_bytes, file_name="ScholarAI_Report.pdf", mime="application/pdf", use_container_width=True)
\ No newline at end of file
+    # The PDF is only rendered on request
+    if st.session_state.get('pdf_key') != report:
+        if st.button("📝 Prepare PDF Report", use_container_width=True):
+            with requestProfiler.request('generate_pdf', programs=len(st.session_state.results),
+                                         catalog_version=matcher.catalog_version):
+                st.session_state.pdf_bytes = cached_pdf(st.session_state.current_profile, st.session_state.results)
+            st.session_state.pdf_key = report
+            if metrics.ENABLED:
+                metrics.write()
+    if st.session_state.get('pdf_key') == report:
+        st.download_button("📄 Download PDF Report", data=st.session_state.pdf_bytes, file_name="ScholarAI_Report.pdf", mime="application/pdf", use_container_width=True)
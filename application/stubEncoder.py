@@ -0,0 +1,42 @@
+import re
+import zlib
+
+import numpy as np
+
+_TOKEN = re.compile(r'\w+')
+
+
+class StubEncoder:
+    """Deterministic stand-in for SentenceTransformer: no network, no model download, no torch.
+
+    Texts are embedded by hashing their words and character trigrams into a fixed-size vector,
+    so related strings ("Computer Science" / "Computing") still get non-trivial similarity.
+    Only for benchmarks, load tests and local service runs - not for real matching.
+    """
+
+    model_name = 'stub-hash-384'
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in _TOKEN.findall(text.lower()):
+            features = [word] + [word[i:i + 3] for i in range(max(1, len(word) - 2))]
+            for j, feature in enumerate(features):
+                h = zlib.crc32(feature.encode('utf-8'))
+                vec[h % self.dim] += (1.0 if (h >> 16) & 1 else -1.0) * (2.0 if j == 0 else 1.0)
+        vec[0] += 0.1  # keeps empty / unseen texts away from the zero vector
+        return vec
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embs = np.stack([self._embed(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        if normalize_embeddings and len(texts):
+            embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+        return embs[0] if single else embs
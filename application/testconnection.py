@@ -1,16 +1,11 @@
-import pyodbc
+from programRepository import get_repository
 
 try:
-    conn = pyodbc.connect(
-        'Driver={ODBC Driver 17 for SQL Server};'
-        'Server=DESKTOP-2G14Q4N\MSSQLSERVER01;'
-        'Trusted_Connection=yes;'
-    )
-    cursor = conn.cursor()
-    cursor.execute("SELECT @@version")
-    print("SQL Server Connected Successfully!")
-    print(cursor.fetchone()[0])
-    conn.close()
+    repository = get_repository()
+    version = repository.server_version()
+    print(f"{repository.dialect} Connected Successfully!")
+    print(version)
+    print(f"Catalog version: {repository.catalog_version()}")
 except Exception as e:
     print(f"Connection Failed: {e}")
-    print("Make sure SQL Server is running and server name is correct")
\ No newline at end of file
+    print("Make sure SQL Server is running and server name is correct (or set SMARTSCHOLAR_DB=sqlite:<path>)")
\ No newline at end of file
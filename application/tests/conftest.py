@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+# Stub-encoder artifacts never go next to the real model's, and nothing is cached across runs
+os.environ['SMARTSCHOLAR_ARTIFACT_DIR'] = tempfile.mkdtemp(prefix='smartscholar-tests-')
+os.environ['SMARTSCHOLAR_EMBEDDING_CACHE'] = 'off'
+
+
+@pytest.fixture(scope='session')
+def matcher():
+    from matchService import local_matcher
+
+    m = local_matcher(os.path.join(os.path.dirname(APP_DIR), 'dataset_clean.csv'))
+    m.get_all_programs()
+    return m
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+PROFILE = {'cgpa': 3.1, 'cgpa_scale': 4.0, 'ielts': 6.5, 'toefl': 0, 'work_experience': 2}
+FIELDS = ['Bachelors in Computer Science', 'computer science', 'Physics', 'Mechanical Engineering', 'Economics',
+          'BSc Data Science and AI', 'Law', 'Public Health', 'Fine Arts', '']
+
+
+def exact_ranking(matcher, profile):
+    df = matcher.get_all_programs()
+    field = matcher._clean_text(profile['field'])
+    similarity = np.asarray(matcher.program_embeddings, dtype=np.float32) @ matcher._encode(field)
+    domain_ok = matcher._program_domains == matcher.infer_domain(field)
+    return matcher._score_frame(profile, df, similarity, domain_ok)
+
+
+@pytest.fixture(params=[None, 0.0], ids=['default-snap', 'always-snap'])
+def snapping(request, matcher):
+    """Runs with the configured threshold, and with every field snapped so the edge guard does the work."""
+    original = matcher.field_snap
+    if request.param is not None:
+        matcher.field_snap = request.param
+    matcher._taxonomy_key = None
+    yield matcher
+    matcher.field_snap = original
+    matcher._taxonomy_key = None
+
+
+@pytest.mark.parametrize('field', FIELDS)
+def test_rank_programs_matches_exact_scoring(snapping, field):
+    profile = dict(PROFILE, field=field)
+    assert snapping.rank_programs(profile).equals(exact_ranking(snapping, profile))
+
+
+@pytest.mark.parametrize('field', FIELDS)
+def test_rank_programs_agrees_with_rank_top_k(snapping, field):
+    profile = dict(PROFILE, field=field)
+    ranked = snapping.rank_programs(profile)
+    matched = ranked[ranked['overall_match'] > 0].reset_index(drop=True)
+    top = snapping.rank_top_k(profile, k=len(ranked), hard_filters=False, nprobe=10 ** 6)
+    # Empty frames differ only in dtypes
+    assert top.equals(matched) if len(matched) else top.empty
+
+
+@pytest.mark.parametrize('field', FIELDS)
+def test_calculate_total_match_agrees_with_rank_programs(snapping, field):
+    profile = dict(PROFILE, field=field)
+    scores = dict(zip(snapping.rank_programs(profile)['program_name'], snapping.rank_programs(profile)['overall_match']))
+    for _, program in snapping.get_all_programs().iterrows():
+        assert snapping.calculate_total_match(profile, program)['overall_match'] == scores[program['program_name']]
+
+
+def test_snapped_row_only_recomputes_near_band_edges(matcher):
+    import fieldTaxonomy
+
+    matcher.field_snap = 0.0
+    matcher._taxonomy_key = None
+    try:
+        taxonomy = matcher._get_taxonomy()
+        canonical, error, emb = matcher._canonical_field(taxonomy, 'Mechanical Engineering')
+        assert canonical is not None and error < 2
+        row = matcher._field_row(taxonomy, matcher.program_embeddings, 'Mechanical Engineering')
+        exact = np.asarray(matcher.program_embeddings, dtype=np.float32) @ emb
+        near = fieldTaxonomy.near_edges(taxonomy.table[canonical], matcher.FIELD_BAND_EDGES, error)
+        np.testing.assert_allclose(row[near], exact[near], atol=1e-6)
+        np.testing.assert_array_equal(row[~near], taxonomy.table[canonical][~near])
+    finally:
+        matcher.field_snap = fieldTaxonomy.DEFAULT_SNAP
+        matcher._taxonomy_key = None
+
+
+def test_rank_top_k_returns_fewer_than_k_when_few_programs_match(matcher):
+    profile = dict(PROFILE, field='Public Health')
+    ranked = matcher.rank_programs(profile)
+    matched = int((ranked['overall_match'] > 0).sum())
+    assert 0 < matched < len(ranked)
+    top = matcher.rank_top_k(profile, k=len(ranked), hard_filters=False, nprobe=10 ** 6)
+    # No zero-score padding: only the programs past the domain and similarity gates
+    assert len(top) == matched
+    assert (top['overall_match'] > 0).all()
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import pytest
+
+from matchService import HttpError, MatchService
+
+VALID = {'field': 'Economics', 'cgpa': 3.2, 'cgpa_scale': 4, 'ielts': 7, 'toefl': 0, 'work_experience': 1}
+
+
+@pytest.fixture(scope='module')
+def service(matcher):
+    return MatchService(matcher)
+
+
+def rank(service, body: bytes):
+    async def run():
+        batcher = asyncio.create_task(service.batcher.run())
+        try:
+            return await service.rank(body)
+        finally:
+            batcher.cancel()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('key', ['cgpa', 'cgpa_scale', 'ielts', 'toefl', 'work_experience'])
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf'])
+def test_non_finite_values_are_rejected(service, key, value):
+    with pytest.raises(HttpError) as exc:
+        rank(service, json.dumps(dict(VALID, **{key: value})).encode())
+    assert exc.value.status == 400
+
+
+@pytest.mark.parametrize('literal', ['NaN', 'Infinity', '-Infinity'])
+def test_non_standard_json_literals_are_rejected(service, literal):
+    with pytest.raises(HttpError) as exc:
+        rank(service, b'{"field": "Economics", "cgpa": %s}' % literal.encode())
+    assert exc.value.status == 400
+
+
+@pytest.mark.parametrize('cgpa', [None, ''])
+def test_cgpa_is_required(service, cgpa):
+    body = dict(VALID, cgpa=cgpa) if cgpa is not None else {k: v for k, v in VALID.items() if k != 'cgpa'}
+    with pytest.raises(HttpError) as exc:
+        rank(service, json.dumps(body).encode())
+    assert exc.value.status == 400
+
+
+def test_valid_profile_is_ranked(service):
+    response = rank(service, json.dumps(dict(VALID, top_k=3)).encode())
+    assert len(response['results']) == 3
+    assert all(0 <= r['overall_match'] <= 100 for r in response['results'])
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+PROFILE = {'cgpa': 3.1, 'cgpa_scale': 4.0, 'ielts': 6.5, 'toefl': 0, 'field': 'Computer Science'}
+
+
+@pytest.mark.parametrize('years', [0, 0.5, 1, 5])
+def test_work_experience_reports_the_profiles_own_years(matcher, years):
+    result = matcher.what_if(dict(PROFILE, work_experience=years))
+    for t in (60, 80):
+        column = result[f"work_experience_for_{t}"]
+        reached = result['overall_match'] >= t
+        assert (column[reached] == years).all()
+        # The others need at least a year of experience, or cannot get there by it
+        assert (column[~reached].isna() | (column[~reached] == 1)).all()
+
+
+def test_work_experience_scores_like_rank_programs(matcher):
+    """Several years are still scored like one, so the matches and the search agree with one year."""
+    one = matcher.what_if(dict(PROFILE, work_experience=1))
+    five = matcher.what_if(dict(PROFILE, work_experience=5))
+    assert np.array_equal(one['overall_match'], five['overall_match'])
+    for t in (60, 80):
+        assert one[f"work_experience_for_{t}"].isna().equals(five[f"work_experience_for_{t}"].isna())